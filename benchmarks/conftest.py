@@ -0,0 +1,47 @@
+import copy
+import tracemalloc
+import pytest
+from pynrm.Pedigree import Pedigree
+from pynrm.Simulator import Simulator
+
+
+@pytest.fixture
+def simulate():
+    """Returns a function that reproduces the given number of generations from a seeded pedigree."""
+
+    def run(gens, male_size=100, female_size=100, male_k=5, female_k=20, w=0.2):
+        pedigree = Pedigree(male_size=male_size, female_size=female_size, rng=0)
+        simulator = Simulator(pedigree, male_k, female_k, 0.6, w, rng=0)
+        for _ in range(gens):
+            simulator.reproduce()
+        return simulator
+
+    return run
+
+
+@pytest.fixture
+def fresh_simulator():
+    """Returns a function that copies a simulator without the cached relationship values of its pedigree."""
+
+    def fresh(simulator):
+        simulator = copy.deepcopy(simulator)
+        simulator.pedigree.nrm.invalidate()
+        return simulator
+
+    return fresh
+
+
+@pytest.fixture
+def peak_memory(benchmark):
+    """Returns a function that runs a benchmarked function once under tracemalloc and records its peak memory in
+    bytes alongside the timings."""
+
+    def track(func, *args):
+        tracemalloc.start()
+        try:
+            func(*args)
+            benchmark.extra_info["peak_memory"] = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    return track
@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+from pynrm.nrm import get_nrm, get_avg_inbreeding, nrm_block
+
+
+@pytest.mark.parametrize("depth", [2, 4, 8, 16])
+def test_get_nrm(benchmark, peak_memory, simulate, depth):
+    pedigree = simulate(depth).pedigree
+    last = len(pedigree) - 1
+
+    def run():
+        pedigree.nrm.invalidate()
+        get_nrm(pedigree, last - 1, last)
+        get_nrm(pedigree, last, last)
+
+    peak_memory(run)
+    benchmark.pedantic(run, rounds=20)
+
+
+@pytest.mark.parametrize("depth", [2, 4, 8, 16])
+def test_get_avg_inbreeding(benchmark, peak_memory, simulate, depth):
+    pedigree = simulate(depth).pedigree
+
+    def run():
+        pedigree.nrm.invalidate()
+        get_avg_inbreeding(pedigree, depth)
+
+    peak_memory(run)
+    benchmark.pedantic(run, rounds=20)
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_nrm_block(benchmark, peak_memory, simulate, workers):
+    pedigree = simulate(8).pedigree
+    ids = np.flatnonzero(pedigree.gen == 8)
+
+    def run():
+        nrm_block(pedigree, ids, ids, workers=workers, tile=64)
+
+    peak_memory(run)
+    benchmark.pedantic(run, rounds=20)
@@ -0,0 +1,32 @@
+import numpy as np
+import pytest
+
+
+@pytest.mark.parametrize("n", [200, 1000])
+@pytest.mark.parametrize("k", [5, 20, 50])
+def test_get_top_k(benchmark, peak_memory, simulate, fresh_simulator, n, k):
+    simulator = simulate(2, male_size=n, female_size=n, male_k=10, female_k=n // 10)
+    candidates = np.flatnonzero(simulator.pedigree.gen == simulator.gen).tolist()[:n]
+
+    def setup():
+        return (fresh_simulator(simulator), list(candidates)), {}
+
+    def run(simulator, candidates):
+        simulator.get_top_k([], candidates, k)
+
+    peak_memory(run, *setup()[0])
+    benchmark.pedantic(run, setup=setup, rounds=5)
+
+
+@pytest.mark.parametrize("gens", [0, 4, 8])
+def test_reproduce(benchmark, peak_memory, simulate, fresh_simulator, gens):
+    simulator = simulate(gens)
+
+    def setup():
+        return (fresh_simulator(simulator),), {}
+
+    def run(simulator):
+        simulator.reproduce()
+
+    peak_memory(run, *setup()[0])
+    benchmark.pedantic(run, setup=setup, rounds=5)
@@ -1,5 +1,102 @@
+import os
 import numpy as np
 import pandas as pd
+from .optional import optional_import
+
+# codes of the sex array, indexing SEXES gives back the labels used in the dataframe
+MALE = 0
+FEMALE = 1
+SEXES = np.array(["M", "F"], dtype=object)
+
+
+def _make_rng(rng):
+    """Returns a random number generator from a generator, a seed or None for fresh entropy."""
+
+    if rng is not None and not isinstance(rng, (int, np.random.SeedSequence, np.random.Generator)):
+        raise TypeError("'rng' must be of type Generator or int")
+
+    return np.random.default_rng(rng)
+
+
+def _read_chunks(path, chunksize):
+    """Yields chunks of records of a csv or parquet file as dataframes, reading csv values as strings."""
+
+    if os.fspath(path).endswith(".parquet"):
+        pq = optional_import("pyarrow.parquet", "arrow")
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunksize, dtype=str, keep_default_na=False, na_values=[""])
+
+
+def _topological_order(sire, dam):
+    """Orders animals so that parents precede their offspring.
+
+    Animals are taken one depth level at a time, starting from those without known parents, and each level releases
+    the offspring whose parents have all been taken. Animals never released are part of a cycle.
+
+    Returns:
+        A tuple of an array of animal indices in topological order and an array of the depth level of each animal.
+    """
+
+    n = len(sire)
+    child = np.concatenate([np.flatnonzero(sire >= 0), np.flatnonzero(dam >= 0)])
+    parent = np.concatenate([sire[sire >= 0], dam[dam >= 0]])
+    by_parent = np.argsort(parent, kind="stable")
+    child = child[by_parent]
+    end = np.cumsum(np.bincount(parent, minlength=n))
+    start = end - np.bincount(parent, minlength=n)
+
+    pending = np.bincount(child, minlength=n)
+    level = np.zeros(n, dtype=np.int64)
+    frontier = np.flatnonzero(pending == 0)
+    order = []
+    depth = 0
+    while len(frontier) > 0:
+        order.append(frontier)
+        level[frontier] = depth
+        depth += 1
+
+        # gather the offspring of the whole frontier at once and release those without pending parents
+        counts = end[frontier] - start[frontier]
+        offsets = np.repeat(start[frontier] - np.cumsum(counts) + counts, counts)
+        offspring = child[np.arange(counts.sum()) + offsets]
+        np.subtract.at(pending, offspring, 1)
+        frontier = np.unique(offspring[pending[offspring] == 0])
+
+    order = np.concatenate(order) if order else np.empty(0, dtype=np.int64)
+    if len(order) < n:
+        raise ValueError("pedigree contains a cycle")
+
+    return order, level
+
+
+def _frame(start, gen, sire, dam, ebv, sex):
+    """Returns records of consecutive animals from the given id onwards as a dataframe in the form of data."""
+
+    return pd.DataFrame(
+        {
+            "gen": gen.astype(int),
+            "sire": pd.arrays.IntegerArray(sire.astype(np.int64), sire < 0),
+            "dam": pd.arrays.IntegerArray(dam.astype(np.int64), dam < 0),
+            "ebv": ebv,
+            "sex": SEXES[sex],
+        },
+        index=pd.RangeIndex(start, start + len(gen)),
+    )
+
+
+def _relabel(frame, labels):
+    """Returns a dataframe with animals, sires and dams labelled by the given labels, indexed by animal id."""
+
+    frame = frame.copy()
+    sire = frame["sire"].to_numpy(dtype=np.int64, na_value=-1)
+    dam = frame["dam"].to_numpy(dtype=np.int64, na_value=-1)
+    frame.index = pd.Index(labels[frame.index.to_numpy()], name="id")
+    frame["sire"] = labels[sire]
+    frame["dam"] = labels[dam]
+
+    return frame
 
 
 class Pedigree:
@@ -8,14 +105,35 @@ class Pedigree:
     Given a dataframe, validates and converts it to the form that Simulator class expects. If data not provided,
     randomly generates initial generation of 1000 animals with 500 males and females each.
 
+    Records are kept in contiguous arrays indexed by animal id, which is the position of the animal in the
+    pedigree. Parents always precede their offspring.
+
+    Full records of the oldest animals can be spilled to a columnar store on disk with spill. Generation numbers and
+    parents of all animals stay in memory for relationships and inbreeding, while EBV and sexes are only held from
+    the first animal not spilled onwards.
+
     Attributes:
+        gen: An int32 array of generation numbers.
+        sire: An int32 array of sire ids with -1 for unknown sires.
+        dam: An int32 array of dam ids with -1 for unknown dams.
+        ebv: A float64 array of genetic values or estimated breeding values (EBV) of the animals held in memory,
+            indexed by animal id minus spilled.
+        sex: An int8 array of sexes coded as MALE or FEMALE of the animals held in memory, indexed by animal id minus
+            spilled.
         data: A dataframe where each row contains information of an individual animal including generation, sire id,
             dam id, genetic value or estimated breeding value (EBV), and sex. Index of the row represents the id of
             each animal. Columns for ids of sire and dam have nullable integer datatype for when the information is
-            unknown.
+            unknown. Holds only the animals held in memory. Each access returns a snapshot copied from a frame built
+            from the arrays when first read after a change, so changes to it are not written back to the pedigree.
+        nrm: An instance of NrmEngine class caching the numerator relationship matrix values of the pedigree. Created
+            on first access.
+        original_ids: A list of ids the animals had in the source they were imported from, indexed by animal id. None
+            for animals without one, or None when the pedigree was not imported.
+        spilled: An integer count of the oldest animals whose full records were moved to store.
+        store: An instance of ColumnStore class holding the spilled records, or None when nothing was spilled.
     """
 
-    def __init__(self, data=None, male_size=500, female_size=500):
+    def __init__(self, data=None, male_size=500, female_size=500, rng=None):
         """Initializes the instance with pedigree data.
 
         Args:
@@ -24,41 +142,503 @@ class Pedigree:
             male_size: An integer count of males to generate for initial generation when data is None. Defaults to 500.
             female_size: An integer count of females to generate for initial generation when data is None. Defaults to
                 500.
+            rng: A numpy random Generator, or an integer seed, to draw EBV of the initial generation from when data is
+                None. Defaults to None for fresh entropy.
         """
 
-        dtype = {"gen": int, "sire": pd.Int64Dtype(), "dam": pd.Int64Dtype(), "ebv": float, "sex": str}
+        rng = _make_rng(rng)
 
         if data is not None:
             if isinstance(data, pd.DataFrame):
-                self.data = pd.DataFrame(data=data, columns=["gen", "sire", "dam", "ebv", "sex"]).astype(dtype=dtype)
+                data = pd.DataFrame(data=data, columns=["gen", "sire", "dam", "ebv", "sex"])
+                sex = data["sex"].astype(str)
+                if not sex.isin(SEXES).all():
+                    raise ValueError("'sex' must be either 'M' or 'F'")
+
+                gen = data["gen"].to_numpy(dtype=np.int32)
+                sire = pd.array(data["sire"], dtype=pd.Int64Dtype()).fillna(-1).to_numpy(dtype=np.int32)
+                dam = pd.array(data["dam"], dtype=pd.Int64Dtype()).fillna(-1).to_numpy(dtype=np.int32)
+                ebv = data["ebv"].to_numpy(dtype=np.float64)
+                sex = np.where(sex == "M", MALE, FEMALE).astype(np.int8)
             else:
                 raise TypeError("'data' must be of type dataframe")
         else:
-            male = pd.DataFrame(
-                {
-                    "gen": 0,
-                    "sire": None,
-                    "dam": None,
-                    "ebv": np.random.normal(0, 1, size=male_size),
-                    "sex": "M",
-                }
-            )
-            female = pd.DataFrame(
+            gen = 0
+            sire = np.full(male_size + female_size, -1, dtype=np.int32)
+            dam = np.full(male_size + female_size, -1, dtype=np.int32)
+            ebv = rng.normal(0, 1, size=male_size + female_size)
+            sex = np.repeat(np.array([MALE, FEMALE], dtype=np.int8), [male_size, female_size])
+
+        self._gen = np.empty(0, dtype=np.int32)
+        self._sire = np.empty(0, dtype=np.int32)
+        self._dam = np.empty(0, dtype=np.int32)
+        self._ebv = np.empty(0, dtype=np.float64)
+        self._sex = np.empty(0, dtype=np.int8)
+
+        self._n = 0
+        self.spilled = 0
+        self.store = None
+        self._data = None
+        self._nrm = None
+        self.original_ids = None
+        self.append(gen, sire, dam, ebv, sex)
+
+    @classmethod
+    def from_arrays(cls, gen, sire, dam, ebv, sex):
+        """Creates a pedigree from arrays of records.
+
+        Args:
+            gen: An array of integers indicating generation numbers.
+            sire: An array of integers indicating sire ids with -1 for unknown sires.
+            dam: An array of integers indicating dam ids with -1 for unknown dams.
+            ebv: An array of floats indicating EBV.
+            sex: An array of sexes coded as MALE or FEMALE.
+
+        Returns:
+            An instance of Pedigree class holding the given records.
+        """
+
+        pedigree = cls(male_size=0, female_size=0)
+        pedigree.append(gen, sire, dam, ebv, sex)
+
+        return pedigree
+
+    @classmethod
+    def from_file(cls, path, chunksize=100000, unknown=None, missing="raise"):
+        """Imports a pedigree from a csv or parquet file.
+
+        Reads the file in chunks and maps the ids of the animals, which may be arbitrary strings, to dense integer ids
+        through a hash index. Records may come in any order: animals are sorted so that ancestors come first, and
+        cycles in the pedigree are rejected. Original ids are kept in original_ids.
+
+        The file must have id, sire and dam columns, with empty values for unknown parents. Optional columns are ebv
+        (defaults to 0), sex as 'M' or 'F' (defaults to 'M' for animals recorded as a sire and 'F' otherwise) and gen
+        (defaults to the depth of the animal in the pedigree). Parquet files require pyarrow.
+
+        Args:
+            path: A path of the file to import. Read as parquet when it ends with '.parquet' and as csv otherwise.
+            chunksize: An integer count of records to read at a time. Defaults to 100000.
+            unknown: A list of values that also mark unknown parents, such as '0'. Defaults to None.
+            missing: A string indicating how parents without a record of their own are handled. 'raise' rejects the
+                pedigree and 'add' adds them as founders. Defaults to 'raise'.
+
+        Returns:
+            An instance of Pedigree class holding the imported records.
+        """
+
+        if not isinstance(chunksize, int):
+            raise TypeError("'chunksize' must be of type int")
+        if missing not in ("raise", "add"):
+            raise ValueError("'missing' must be either 'raise' or 'add'")
+        if chunksize <= 0:
+            raise ValueError("'chunksize' must be positive")
+
+        unknown = set(unknown or [])
+        index = {}
+        ids = []
+
+        def code(value):
+            if value is None or value in unknown:
+                return -1
+            if value not in index:
+                index[value] = len(index)
+                ids.append(value)
+            return index[value]
+
+        animals = []
+        records = {"sire": [], "dam": [], "ebv": [], "sex": [], "gen": []}
+        for chunk in _read_chunks(path, chunksize):
+            if not {"id", "sire", "dam"}.issubset(chunk.columns):
+                raise ValueError("file must have 'id', 'sire' and 'dam' columns")
+            chunk = chunk.astype(object).where(chunk.notna(), None)
+
+            animals.append(np.array([code(value) for value in chunk["id"]], dtype=np.int64))
+            records["sire"].append(np.array([code(value) for value in chunk["sire"]], dtype=np.int64))
+            records["dam"].append(np.array([code(value) for value in chunk["dam"]], dtype=np.int64))
+            for name in ("ebv", "sex", "gen"):
+                records[name].append(chunk[name].to_numpy() if name in chunk.columns else np.full(len(chunk), None))
+
+        n = len(ids)
+        animal = np.concatenate(animals) if animals else np.empty(0, dtype=np.int64)
+        if np.any(animal < 0):
+            raise ValueError("'id' cannot be unknown")
+        if len(np.unique(animal)) < len(animal):
+            raise ValueError("'id' must be unique")
+
+        recorded = np.zeros(n, dtype=bool)
+        recorded[animal] = True
+        if missing == "raise" and not recorded.all():
+            raise ValueError("parents without a record: {}".format([ids[i] for i in np.flatnonzero(~recorded)[:5]]))
+
+        # parents get an id as soon as they are referenced, so records are scattered into place by id
+        columns = {}
+        for name, values in records.items():
+            columns[name] = np.full(n, -1 if name in ("sire", "dam") else None, dtype=object)
+            if len(animal) > 0:
+                columns[name][animal] = np.concatenate(values)
+        sire = columns["sire"].astype(np.int64)
+        dam = columns["dam"].astype(np.int64)
+
+        order, level = _topological_order(sire, dam)
+        new_id = np.empty(n + 1, dtype=np.int64)
+        new_id[order] = np.arange(n)
+        new_id[-1] = -1
+
+        ebv = pd.to_numeric(pd.Series(columns["ebv"])).fillna(0).to_numpy(dtype=np.float64)
+        gen = pd.to_numeric(pd.Series(columns["gen"])).fillna(pd.Series(level)).to_numpy(dtype=np.int32)
+        sex = pd.Series(columns["sex"], dtype=object)
+        sex = sex.where(sex.notna(), np.where(np.isin(np.arange(n), sire), "M", "F"))
+        if not sex.isin(SEXES).all():
+            raise ValueError("'sex' must be either 'M' or 'F'")
+        sex = np.where(sex == "M", MALE, FEMALE)
+
+        pedigree = cls.from_arrays(gen[order], new_id[sire[order]], new_id[dam[order]], ebv[order], sex[order])
+        pedigree.original_ids = [ids[i] for i in order]
+
+        return pedigree
+
+    def __len__(self):
+        return self._n
+
+    @property
+    def gen(self):
+        return self._gen[: self._n]
+
+    @property
+    def sire(self):
+        return self._sire[: self._n]
+
+    @property
+    def dam(self):
+        return self._dam[: self._n]
+
+    @property
+    def ebv(self):
+        return self._ebv[: self._n - self.spilled]
+
+    @property
+    def sex(self):
+        return self._sex[: self._n - self.spilled]
+
+    @property
+    def data(self):
+        if self._data is None:
+            start = self.spilled
+            self._data = _frame(start, self.gen[start:], self.sire[start:], self.dam[start:], self.ebv, self.sex)
+        return self._data.copy()
+
+    @property
+    def nrm(self):
+        if self._nrm is None:
+            from .nrm import NrmEngine
+
+            self._nrm = NrmEngine(self)
+        return self._nrm
+
+    @nrm.setter
+    def nrm(self, engine):
+        self._nrm = engine
+
+    def append(self, gen, sire, dam, ebv, sex):
+        """Appends animals to the pedigree.
+
+        Validates only the new records and copies them into the arrays, which grow geometrically so that appending
+        takes amortized constant time per animal. The dataframe is rebuilt on next access, while cached relationship
+        values stay valid since existing animals are left unchanged.
+
+        Args:
+            gen: An integer, or an array of integers, indicating the generation number of the new animals.
+            sire: An array of integers indicating sire ids of the new animals with -1 for unknown sires.
+            dam: An array of integers indicating dam ids of the new animals with -1 for unknown dams.
+            ebv: An array of floats indicating EBV of the new animals.
+            sex: An array of sexes of the new animals coded as MALE or FEMALE.
+
+        Returns:
+            An array of integers indicating the ids given to the new animals.
+        """
+
+        sire = np.asarray(sire, dtype=np.int32)
+        dam = np.asarray(dam, dtype=np.int32)
+        ebv = np.asarray(ebv, dtype=np.float64)
+        sex = np.asarray(sex, dtype=np.int8)
+        size = len(sire)
+        gen = np.broadcast_to(np.asarray(gen, dtype=np.int32), (size,))
+
+        if len(dam) != size or len(ebv) != size or len(sex) != size:
+            raise ValueError("records of new animals must have the same length")
+        if not np.isin(sex, [MALE, FEMALE]).all():
+            raise ValueError("'sex' must be either MALE or FEMALE")
+
+        # ids are positions, so a parent must have a smaller id than its offspring
+        start = self._n
+        ids = np.arange(start, start + size)
+        if np.any(sire < -1) or np.any(dam < -1) or np.any(sire >= ids) or np.any(dam >= ids):
+            raise ValueError("parents must precede their offspring in the pedigree")
+
+        # buffers of EBV and sexes start at the first animal held in memory
+        for name, offset in (("_gen", 0), ("_sire", 0), ("_dam", 0), ("_ebv", self.spilled), ("_sex", self.spilled)):
+            buffer = getattr(self, name)
+            if start - offset + size > len(buffer):
+                grown = np.empty(max(start - offset + size, 2 * len(buffer)), dtype=buffer.dtype)
+                grown[: start - offset] = buffer[: start - offset]
+                setattr(self, name, grown)
+
+        self._gen[start : start + size] = gen
+        self._sire[start : start + size] = sire
+        self._dam[start : start + size] = dam
+        self._ebv[start - self.spilled : start - self.spilled + size] = ebv
+        self._sex[start - self.spilled : start - self.spilled + size] = sex
+        self._n = start + size
+        self._data = None
+        if self.original_ids is not None:
+            self.original_ids.extend([None] * size)
+
+        return ids
+
+    def _check_ids(self, ids):
+        ids = np.asarray(ids)
+        if ids.ndim != 1 or (len(ids) > 0 and not np.issubdtype(ids.dtype, np.integer)):
+            raise TypeError("'ids' must be a list of int")
+        if np.any(ids < 0) or np.any(ids >= self._n):
+            raise ValueError("'ids' must be present in the pedigree")
+
+        return ids.astype(np.int64)
+
+    def _records(self, ids, columns):
+        """Returns the given columns of EBV and sexes of the given sorted animals, reading spilled ones from store."""
+
+        spilled = ids[ids < self.spilled]
+        records = {name: getattr(self, name)[ids[ids >= self.spilled] - self.spilled] for name in columns}
+        if len(spilled) == 0:
+            return records
+
+        parts = {name: [] for name in columns}
+        start = 0
+        for batch in self.store.batches(columns):
+            size = len(batch[columns[0]])
+            pos = spilled[(spilled >= start) & (spilled < start + size)] - start
+            for name in columns:
+                parts[name].append(batch[name][pos])
+            start += size
+
+        return {name: np.concatenate(parts[name] + [records[name]]) for name in columns}
+
+    def spill(self, store, stop):
+        """Moves full records of the animals before the given id to a columnar store.
+
+        Records of the animals not spilled yet are appended to the store as one batch, and their EBV and sexes are
+        released from memory. Generation numbers and parents stay in memory, so relationships and inbreeding are
+        computed as before. Spilled records are read back lazily by get_avg_ebv, prune and iter_frames.
+
+        Args:
+            store: An instance of ColumnStore class to append the records to. Must be the same store on every call.
+            stop: An integer indicating the first animal id to keep in memory.
+        """
+
+        if not isinstance(stop, int):
+            raise TypeError("'stop' must be of type int")
+
+        if stop < self.spilled or stop > self._n:
+            raise ValueError("'stop' must be between the spilled and the last animals")
+        if self.store is not None and store is not self.store:
+            raise ValueError("pedigree is already spilled to another store")
+
+        start = self.spilled
+        if stop > start:
+            store.append(
                 {
-                    "gen": 0,
-                    "sire": None,
-                    "dam": None,
-                    "ebv": np.random.normal(0, 1, size=female_size),
-                    "sex": "F",
+                    "gen": self.gen[start:stop],
+                    "sire": self.sire[start:stop],
+                    "dam": self.dam[start:stop],
+                    "ebv": self._ebv[: stop - start],
+                    "sex": self._sex[: stop - start],
                 }
             )
-            data = pd.concat([male, female], ignore_index=True, copy=False)
-            self.data = pd.DataFrame(data=data, columns=["gen", "sire", "dam", "ebv", "sex"]).astype(dtype=dtype)
+
+        # records held in memory are copied into new buffers so that the spilled ones are freed
+        self._ebv = self._ebv[stop - start : self._n - start].copy()
+        self._sex = self._sex[stop - start : self._n - start].copy()
+        self.spilled = stop
+        self.store = store
+        self._data = None
+
+    def ancestors(self, ids, max_depth=None):
+        """Returns the given animals together with their ancestors.
+
+        Walks up the pedigree one generation of parents at a time, taking the parents of the whole frontier at once.
+
+        Args:
+            ids: A list of integers indicating the animals to start from.
+            max_depth: An integer count of generations of parents to walk up. Defaults to None for all ancestors.
+
+        Returns:
+            A sorted array of integers indicating the ids of the animals and their ancestors.
+        """
+
+        ids = self._check_ids(ids)
+        if max_depth is not None and not isinstance(max_depth, int):
+            raise TypeError("'max_depth' must be of type int")
+        if max_depth is not None and max_depth < 0:
+            raise ValueError("'max_depth' cannot be negative")
+
+        mask = np.zeros(self._n, dtype=bool)
+        mask[ids] = True
+        frontier = np.unique(ids)
+        depth = 0
+        while len(frontier) > 0 and (max_depth is None or depth < max_depth):
+            parents = np.concatenate([self.sire[frontier], self.dam[frontier]])
+            parents = np.unique(parents[parents >= 0])
+            frontier = parents[~mask[parents]]
+            mask[frontier] = True
+            depth += 1
+
+        return np.flatnonzero(mask)
+
+    def prune(self, ids, max_depth=None):
+        """Returns the sub-pedigree of the given animals and their ancestors.
+
+        Animals of the sub-pedigree are renumbered densely in their original order, so relationship, inbreeding and
+        selection routines run on it as on any pedigree. Parents beyond max_depth are left unknown. Each animal is
+        labelled in original_ids with its original id, or with its id in this pedigree when it has none, so results
+        can be mapped back with find.
+
+        Args:
+            ids: A list of integers indicating the animals to keep.
+            max_depth: An integer count of generations of ancestors to keep. Defaults to None for all ancestors.
+
+        Returns:
+            An instance of Pedigree class holding the kept animals.
+        """
+
+        keep = self.ancestors(ids, max_depth)
+        index = np.full(self._n + 1, -1, dtype=np.int64)
+        index[keep] = np.arange(len(keep))
+
+        records = self._records(keep, ["ebv", "sex"])
+        pedigree = Pedigree.from_arrays(
+            self.gen[keep], index[self.sire[keep]], index[self.dam[keep]], records["ebv"], records["sex"]
+        )
+        if self.original_ids is None:
+            pedigree.original_ids = keep.tolist()
+        else:
+            pedigree.original_ids = [i if self.original_ids[i] is None else self.original_ids[i] for i in keep.tolist()]
+
+        return pedigree
+
+    def find(self, original_ids):
+        """Returns the ids of the animals with the given original ids.
+
+        Args:
+            original_ids: A list of original ids.
+
+        Returns:
+            An array of integers indicating the id of each animal.
+        """
+
+        if self.original_ids is None:
+            raise ValueError("pedigree has no original ids")
+
+        index = {label: i for i, label in enumerate(self.original_ids) if label is not None}
+        missing = [label for label in original_ids if label not in index]
+        if missing:
+            raise ValueError("original ids not present in the pedigree: {}".format(missing[:5]))
+
+        return np.array([index[label] for label in original_ids], dtype=np.int64)
+
+    def iter_frames(self, original_ids=False):
+        """Yields pedigree data of all animals as dataframes.
+
+        Each batch of spilled records is read from store as its own dataframe, followed by data of the animals held
+        in memory, so all animals can be written out without holding their records in memory at once.
+
+        Args:
+            original_ids: A boolean indicating whether to label animals, sires and dams with their original ids
+                instead of animal ids. Animals without an original id keep their animal id. Defaults to False.
+
+        Yields:
+            Dataframes of pedigree data in the form of data, in the order of animal ids.
+        """
+
+        labels = None
+        if original_ids and self.original_ids is not None:
+            labels = np.array([i if label is None else label for i, label in enumerate(self.original_ids)] + [None])
+
+        start = 0
+        if self.store is not None:
+            for batch in self.store.batches(["gen", "sire", "dam", "ebv", "sex"]):
+                frame = _frame(start, **batch)
+                start += len(frame)
+                yield frame if labels is None else _relabel(frame, labels)
+
+        yield self.data if labels is None else _relabel(self.data, labels)
+
+    def to_frame(self, original_ids=False):
+        """Returns pedigree data as a dataframe.
+
+        Spilled records are read back from store, so the whole pedigree is held in memory at once.
+
+        Args:
+            original_ids: A boolean indicating whether to label animals, sires and dams with their original ids
+                instead of animal ids. Animals without an original id keep their animal id. Defaults to False.
+
+        Returns:
+            A dataframe of pedigree data in the form of data.
+        """
+
+        frames = list(self.iter_frames(original_ids=original_ids))
+
+        return frames[0] if len(frames) == 1 else pd.concat(frames)
+
+    def tail(self, start):
+        """Returns pedigree data of the animals from the given id onwards.
+
+        Only those records are converted, so the cost does not depend on the size of the rest of the pedigree.
+
+        Args:
+            start: An integer indicating the first animal id, which must be held in memory.
+
+        Returns:
+            A dataframe of pedigree data in the form of data.
+        """
+
+        if not isinstance(start, int):
+            raise TypeError("'start' must be of type int")
+        if start < self.spilled or start > len(self):
+            raise ValueError("'start' must be an animal held in memory")
+
+        offset = start - self.spilled
+
+        return _frame(
+            start, self.gen[start:], self.sire[start:], self.dam[start:], self.ebv[offset:], self.sex[offset:]
+        )
+
+    def update_ebv(self, ebv):
+        """Replaces EBV of all animals held in memory, such as after a new evaluation.
+
+        Args:
+            ebv: An array of floats indicating the new EBV of each animal held in memory.
+        """
+
+        ebv = np.asarray(ebv, dtype=np.float64)
+        if ebv.shape != (self._n - self.spilled,):
+            raise ValueError("'ebv' must have a value for each animal")
+
+        self._ebv[: self._n - self.spilled] = ebv
+        self._data = None
+
+    def inbreeding(self):
+        """Returns the inbreeding coefficients of all animals.
+
+        Returns:
+            An array of floats where each value corresponds to the inbreeding coefficient of the animal with that id.
+        """
+
+        return self.nrm.inbreeding().copy()
 
     def get_avg_ebv(self, gen):
         """Returns the average EBV of a generation.
 
-        Average EBV is computed across the generation.
+        Average EBV is computed across the generation, reading EBV of spilled animals from store.
 
         Args:
             gen: An integer indicating the generation number.
@@ -70,4 +650,12 @@ class Pedigree:
         if not isinstance(gen, int):
             raise TypeError("'gen' must be of type int")
 
-        return round(self.data[self.data["gen"] == gen]["ebv"].mean(), 3)
+        mask = self.gen == gen
+        ebv = self.ebv[mask[self.spilled :]]
+        if self.spilled > 0:
+            spilled = np.flatnonzero(mask[: self.spilled])
+            ebv = np.concatenate([self._records(spilled, ["ebv"])["ebv"], ebv])
+        if len(ebv) == 0:
+            return np.nan
+
+        return round(float(ebv.mean()), 3)
@@ -1,8 +1,15 @@
-import matplotlib.pyplot as plt
+import json
+import os
 import numpy as np
-import random
-from .nrm import get_nrm, get_avg_inbreeding
-from .Pedigree import Pedigree
+from .blup import BlupEvaluation
+from .genomic import GenomicRelationship
+from .mating import FactorialMating, MatingStrategy
+from .metrics import MetricsCollector, mean_coancestry, selection_intensity
+from .nrm import NrmEngine
+from .optional import optional_import
+from .Pedigree import FEMALE, MALE, Pedigree, _make_rng
+from .selection import GreedySelection, SelectionStrategy
+from .stats import SimulatorStats
 
 
 class Simulator:
@@ -17,9 +24,35 @@ class Simulator:
         h: A float indicating heritability value.
         w: A float indicating penalization weight for inbreeding while reproduction.
         gen: An integer indicating latest generation number starting from 0. Increments after each reproduction.
+        rng: A numpy random Generator that all random draws of the simulation are taken from.
+        nrm_window: An integer count of past generations to trace relationships back to, or None for all.
+        carry_base: A boolean indicating whether relationships among the base generation of the window are kept.
+        metrics: An instance of MetricsCollector class holding summary statistics of each generation.
+        selection: An instance of SelectionStrategy class choosing the animals to reproduce.
+        mating: An instance of MatingStrategy class pairing the selected animals.
+        evaluation: An instance of BlupEvaluation class estimating EBV, or None for EBV drawn by get_ebvs.
+        stats: An instance of SimulatorStats class collecting timings and counters of each phase of reproduction.
+            Disabled unless enabled with stats.enable.
+        spill: A path of the directory that records of past generations are spilled to, or None to keep them all in
+            memory.
     """
 
-    def __init__(self, pedigree, male_k, female_k, h, w):
+    def __init__(
+        self,
+        pedigree,
+        male_k,
+        female_k,
+        h,
+        w,
+        rng=None,
+        nrm_window=None,
+        carry_base=False,
+        selection=None,
+        mating=None,
+        relationship=None,
+        evaluation=None,
+        spill=None,
+    ):
         """Initializes the instance with pedigree and user-defined parameters.
 
         Args:
@@ -28,6 +61,27 @@ class Simulator:
             female_k: Defines female_k value. Set throughout all simulations.
             h: Defines h value. Set throughout all simulations.
             w: Defines w value. Set throughout all simulations.
+            rng: Defines rng value as a numpy random Generator or an integer seed. Defaults to None for fresh
+                entropy.
+            nrm_window: Defines nrm_window value. Relationships used for selection and EBV are traced back at most
+                this many generations before the latest one, and animals beyond are treated as unrelated, so the
+                cost of each reproduction does not grow with the length of the simulation. Defaults to None.
+            carry_base: Defines carry_base value. When set, relationships among animals of the oldest generation
+                in the window are carried forward as a dense matrix instead of being reset. Defaults to False.
+            selection: Defines selection value. Defaults to None for GreedySelection, which selects by adjusted EBV
+                with get_top_k.
+            mating: Defines mating value. Defaults to None for FactorialMating, which mates every selected male with
+                every selected female.
+            relationship: Defines the relationships used to penalize related candidates during selection, such as a
+                GenomicRelationship instance. Defaults to None for NRM.
+            evaluation: Defines evaluation value as a BlupEvaluation instance, which estimates EBV from simulated
+                phenotypes after each reproduction. Defaults to None for EBV drawn around the parent average with
+                get_ebvs.
+            spill: Defines spill value. When set, full records of each generation are moved to a columnar store in
+                this directory once the next one is bred, replacing anything the store held before. Only the latest
+                generation and the parents and inbreeding coefficients of all animals are kept in memory, so long
+                simulations are not bounded by memory. Cannot be combined with evaluation. Requires pyarrow.
+                Defaults to None.
         """
 
         if not isinstance(pedigree, Pedigree):
@@ -47,8 +101,27 @@ class Simulator:
             raise ValueError("'female_k' cannot be negative")
         if h < 0:
             raise ValueError("'h' cannot be negative")
+        if nrm_window is not None and not isinstance(nrm_window, int):
+            raise TypeError("'nrm_window' must be of type int")
+        if not isinstance(carry_base, bool):
+            raise TypeError("'carry_base' must be of type bool")
+        if selection is not None and not isinstance(selection, SelectionStrategy):
+            raise TypeError("'selection' must be of type SelectionStrategy")
+        if mating is not None and not isinstance(mating, MatingStrategy):
+            raise TypeError("'mating' must be of type MatingStrategy")
+        if relationship is not None and not isinstance(relationship, GenomicRelationship):
+            raise TypeError("'relationship' must be of type GenomicRelationship")
+        if evaluation is not None and not isinstance(evaluation, BlupEvaluation):
+            raise TypeError("'evaluation' must be of type BlupEvaluation")
+
         if w < 0:
             raise ValueError("'w' cannot be negative")
+        if nrm_window is not None and nrm_window < 0:
+            raise ValueError("'nrm_window' cannot be negative")
+        if spill is not None and evaluation is not None:
+            raise ValueError("'evaluation' needs EBV of all animals and cannot be combined with 'spill'")
+        if spill is not None and pedigree.store is not None:
+            raise ValueError("'pedigree' is already spilled")
 
         self.pedigree = pedigree
         self.male_k = male_k
@@ -56,14 +129,80 @@ class Simulator:
         self.h = h
         self.w = w
         self.gen = 0
+        self.rng = _make_rng(rng)
+        self.nrm_window = nrm_window
+        self.carry_base = carry_base
+        self.metrics = MetricsCollector()
+        self.selection = GreedySelection() if selection is None else selection
+        self.mating = FactorialMating() if mating is None else mating
+        self.stats = SimulatorStats()
+        self._relationship = relationship
+        self.evaluation = evaluation
+        self._checkpoint = None
+        self._nrm = None
+        self._window = None
+        self.spill = spill
+        self._store = None
+        if spill is not None:
+            self._store = optional_import("pynrm.store", "arrow").ColumnStore(spill)
+            self._store.clear()
+
+    @property
+    def nrm(self):
+        """NrmEngine instance used for relationships and inbreeding coefficients of the simulation.
+
+        Without a window, this is the engine of the pedigree. Otherwise, an engine limited to the animals from the
+        oldest generation of the window onwards is kept and moved forward as generations are bred.
+        """
+
+        if self.nrm_window is None:
+            return self.pedigree.nrm
+
+        # the window only moves when a generation is bred, so it is located once per generation and pedigree size
+        window = (self.gen, len(self.pedigree))
+        if self._nrm is not None and self._nrm.pedigree is self.pedigree and self._window == window:
+            return self._nrm
+
+        # generations are recorded in order, so the window starts at the first animal of its oldest generation
+        gen = self.pedigree.gen
+        base_gen = self.gen - self.nrm_window
+        start = int(np.searchsorted(gen, base_gen)) if base_gen > 0 else 0
+
+        if self._nrm is None or self._nrm.pedigree is not self.pedigree or self._nrm.start != start:
+            base = None
+            if self.carry_base and 0 < start < len(gen):
+                # relationships among the base generation are read from the previous window before it moves on
+                stop = int(np.searchsorted(gen, base_gen, side="right"))
+                previous = self._nrm if self._nrm is not None and self._nrm.pedigree is self.pedigree else None
+                if previous is None or previous.start > start:
+                    previous = NrmEngine(self.pedigree)
+                cols = list(range(start, stop))
+                base = np.array([previous.row(i, cols) for i in cols])
+            self._nrm = NrmEngine(self.pedigree, start=start, base=base)
+        self._window = window
+
+        return self._nrm
+
+    @property
+    def relationship(self):
+        """Relationships used to penalize related candidates during selection.
+
+        This is the NrmEngine instance of the simulation, unless a GenomicRelationship instance was given, in which
+        case it falls back to that engine for animals without genotypes.
+        """
+
+        if self._relationship is None:
+            return self.nrm
+
+        self._relationship.fallback = self.nrm
+
+        return self._relationship
 
     def get_ebv(self, sire, dam):
         """Randomly generates EBV of an individual animal.
 
-        EBV is computed using heritability, EBV and inbreeding coefficients of sire and dam. It first solves the
-        square root of heritability and average of inbreeding coefficients of sire and dam derived from NRM. Then, it
-        calculates some values, multiplies by random normal deviates, and adds them to the average of EBV of
-        sire and dam.
+        EBV is computed using heritability, EBV and inbreeding coefficients of sire and dam. See get_ebvs for
+        details.
 
         Args:
             sire: An integer indicating the sire id.
@@ -78,14 +217,46 @@ class Simulator:
         if dam < 0:
             raise ValueError("'dam' cannot be negative")
 
-        h_sqrt = np.sqrt(self.h)
-        f = 0.5 * (get_nrm(self.pedigree, sire, sire) + get_nrm(self.pedigree, dam, dam)) - 1
+        return float(self.get_ebvs([sire], [dam])[0])
+
+    def get_ebvs(self, sires, dams):
+        """Randomly generates EBV of a batch of animals.
+
+        EBV is computed using heritability, EBV and inbreeding coefficients of sire and dam. It first solves the
+        square root of heritability and average of inbreeding coefficients of sire and dam. Then, it calculates the
+        deviation of each animal from the average of EBV of sire and dam as the sum of a Mendelian sampling term and a
+        residual term. Both terms are normal, so their sum is drawn at once for the whole batch.
+
+        Args:
+            sires: A list of integers indicating the sire ids.
+            dams: A list of integers indicating the dam ids, paired with the sire ids.
+
+        Returns:
+            An array of floats that corresponds to the randomly generated EBV of each pair of sire and dam.
+        """
+
+        sires = np.asarray(sires, dtype=np.int64)
+        dams = np.asarray(dams, dtype=np.int64)
+
+        if sires.shape != dams.shape:
+            raise ValueError("'sires' and 'dams' must have the same length")
+        if np.any(sires < 0):
+            raise ValueError("'sires' cannot be negative")
+        if np.any(dams < 0):
+            raise ValueError("'dams' cannot be negative")
+        offset = self.pedigree.spilled
+        if np.any(sires < offset) or np.any(dams < offset):
+            raise ValueError("'sires' and 'dams' must not be spilled")
 
-        ebv = 0.5 * (self.pedigree.data.iloc[sire].ebv + self.pedigree.data.iloc[dam].ebv)
-        +round(np.random.normal(0, 1), 3) * h_sqrt * np.sqrt((1 - f) / 2)
-        +round(np.random.normal(0, 1), 3) * np.sqrt(1 - self.h)
+        inbreeding = self.nrm.inbreeding()
+        ebv = self.pedigree.ebv
+        f = 0.5 * (inbreeding[sires] + inbreeding[dams])
 
-        return round(ebv, 3)
+        # variance of the Mendelian sampling term is h * (1 - f) / 2 and of the residual term is 1 - h
+        sd = np.sqrt(self.h * (1 - f) / 2 + (1 - self.h))
+        ebvs = 0.5 * (ebv[sires - offset] + ebv[dams - offset]) + self.rng.normal(0, 1, size=len(sires)) * sd
+
+        return np.round(ebvs, 3)
 
     def get_adjusted_ebv(self, candidate, already_selected):
         """Computes adjusted EBV of the candidate.
@@ -102,7 +273,7 @@ class Simulator:
             A float that corresponds to the adjusted EBV of the candidate.
         """
 
-        ebv = self.pedigree.data.iloc[candidate].ebv
+        ebv = self.pedigree.ebv[candidate - self.pedigree.spilled]
 
         # if none selected as top k yet, then original EBV is used for scoring
         if len(already_selected) == 0:
@@ -111,7 +282,7 @@ class Simulator:
         # adjust EBV relative to top animals already selected
         sum_rel = 0
         for i in already_selected:
-            sum_rel += get_nrm(self.pedigree, i, candidate)
+            sum_rel += self.relationship.get(int(i), int(candidate))
         avg_rel = sum_rel / len(already_selected)
 
         adjusted_ebv = ebv * (1 - self.w * avg_rel)
@@ -121,8 +292,9 @@ class Simulator:
     def get_top_k(self, top_k, candidates, k):
         """Selects top k animals
 
-        Chooses top k animals recursively by picking the candidate with highest adjusted EBV on each iteration until
-        there are k animals selected.
+        Chooses top k animals by picking the candidate with highest adjusted EBV on each iteration until there are k
+        animals selected. The sum of relationships between each candidate and the animals selected so far is kept
+        up to date with one NRM row per selected animal, so adjusted EBV of all candidates are computed at once.
 
         Args:
             top_k: A list of already selected animals.
@@ -130,120 +302,311 @@ class Simulator:
             k: Number of animals to select.
 
         Returns:
-            A list of all selected animals so far. This is a list that contains already selected animals and the newly
-            selected animal from this iteration.
+            A list of all selected animals. This is the list of already selected animals extended with the newly
+            selected animals, which are removed from the list of candidates.
         """
 
         if len(top_k) > k:
             raise ValueError("Length of 'top_k' should not exceed k")
+        if k - len(top_k) > len(candidates):
+            raise ValueError("Not enough 'candidates' to select k animals")
 
-        # base case - top k animals selected
-        if len(top_k) == k:
-            return top_k
-
-        # print("Length of candidates:", len(candidates))
-        # recursive case
-        for i, candidate in enumerate(candidates):
-            adjusted_ebv = self.get_adjusted_ebv(candidate, top_k)
-            if i == 0:
-                selected = candidate
-                max_adjusted_ebv = adjusted_ebv
-            else:
-                if adjusted_ebv > max_adjusted_ebv:
-                    selected = candidate
-                    max_adjusted_ebv = adjusted_ebv
+        ids = np.asarray(candidates, dtype=np.int64)
+        ebv = self.pedigree.ebv[ids - self.pedigree.spilled]
+        scores = np.round(ebv, 3)
+        remaining = np.ones(len(candidates), dtype=bool)
+
+        # without penalization, adjusted EBV never changes and no relationships are needed
+        penalize = self.w != 0
+        if penalize:
+            relationship = self.relationship
+            sum_rel = np.zeros(len(candidates))
+            for i in top_k:
+                sum_rel += relationship.row(i, candidates)
 
-        top_k.append(selected)
-        candidates.remove(selected)
+        while len(top_k) < k:
+            if penalize and len(top_k) > 0:
+                scores = np.round(ebv * (1 - self.w * (sum_rel / len(top_k))), 3)
 
-        return self.get_top_k(top_k, candidates, k)
+            # argmax picks the first of equally scored candidates
+            pick = int(np.argmax(np.where(remaining, scores, -np.inf)))
+            selected = candidates[pick]
+            remaining[pick] = False
+            top_k.append(selected)
+
+            if penalize:
+                sum_rel[remaining] += relationship.row(selected, ids[remaining].tolist())
+
+        candidates[:] = [candidate for candidate, keep in zip(candidates, remaining) if keep]
+
+        return top_k
 
     def reproduce(self):
         """Produces the next generation of animals
 
-        Selects males and females (male_k and female_k animals each) to reproduce and generates new animals. It also
-        updates the latest generation number and pedigree of the simulator to reflect the new reproductive cycle.
+        Selects males and females (male_k and female_k animals each) with the selection strategy of the simulator,
+        pairs them with its mating strategy and generates one new animal per mating. It also updates the latest
+        generation number and pedigree of the simulator to reflect the new reproductive cycle. When spilling, the
+        previous generations are then moved to the store.
 
         Returns:
-            A dataframe consisting all animals before reproduction and newly bred animals.
+            A dataframe of the newly bred animals, indexed by animal id. Data of the whole pedigree is read from
+            pedigree.data, or with pedigree.iter_frames when spilling.
         """
 
-        # fetch all males and females from the latest generation
-        curr_gen = self.pedigree.data[self.pedigree.data["gen"] == self.gen]
-        all_males = curr_gen[curr_gen["sex"] == "M"].index.tolist()
-        all_females = curr_gen[curr_gen["sex"] == "F"].index.tolist()
+        stats = self.stats
 
-        # select top males and females to reproduce
-        top_males = self.get_top_k([], all_males, self.male_k)
-        # print("Get top {} males from {} done".format(self.male_k, len(all_males)))
-        top_females = self.get_top_k([], all_females, self.female_k)
-        # print("Get top {} females {} done".format(self.female_k, len(all_females)))
+        with stats.phase("metrics", self.pedigree.nrm):
+            self._record_metrics()
 
-        # copy current pedigree data before reproduction and increment generation number
-        new_pedigree_data = self.pedigree.data
-        self.gen += 1
+        # fetch all males and females from the latest generation, which is always held in memory
+        offset = self.pedigree.spilled
+        curr_gen = self.pedigree.gen[offset:] == self.gen
+        males = np.flatnonzero(curr_gen & (self.pedigree.sex == MALE))
+        females = np.flatnonzero(curr_gen & (self.pedigree.sex == FEMALE))
+        all_males = (males + offset).tolist()
+        all_females = (females + offset).tolist()
+        male_ebv = self.pedigree.ebv[males]
+        female_ebv = self.pedigree.ebv[females]
 
-        for i in range(len(top_males)):
-            sire = top_males[i]
-            for j in range(len(top_females)):
-                dam = top_females[j]
-                ebv = self.get_ebv(sire, dam)
-                new_pedigree_data.loc[len(new_pedigree_data.index)] = [
-                    self.gen,
-                    sire,
-                    dam,
-                    ebv,
-                    random.choices(["M", "F"])[0],
+        # select top males and females to reproduce
+        with stats.phase("select", self.nrm):
+            top_males = self.selection.select(self, all_males, self.male_k)
+            # print("Get top {} males from {} done".format(self.male_k, len(all_males)))
+            top_females = self.selection.select(self, all_females, self.female_k)
+            # print("Get top {} females {} done".format(self.female_k, len(all_females)))
+
+        # pair the selected males and females
+        with stats.phase("mate", self.nrm):
+            sires, dams = self.mating.plan(self, top_males, top_females)
+
+        # breed the whole generation as one batch appended to the pedigree
+        with stats.phase("ebv", self.nrm):
+            if self.evaluation is None:
+                ebvs = self.get_ebvs(sires, dams)
+            else:
+                # new animals enter with their parent average until the whole pedigree is evaluated
+                self.evaluation.breed(self, sires, dams)
+                ebvs = 0.5 * (self.pedigree.ebv[sires - offset] + self.pedigree.ebv[dams - offset])
+            sexes = self.rng.choice(np.array([MALE, FEMALE], dtype=np.int8), size=len(sires))
+        with stats.phase("append"):
+            self.pedigree.append(self.gen + 1, sires, dams, ebvs, sexes)
+
+        # the generation number is only incremented once the offspring are bred, so the window of relationships
+        # stays the same from selection to breeding
+        self.gen += 1
+        if self.evaluation is not None:
+            with stats.phase("evaluate"):
+                self.pedigree.update_ebv(self.evaluation.evaluate(self.pedigree, self.h))
+                ebvs = self.pedigree.ebv[len(self.pedigree) - len(sires) - offset :]
+        stats.count("rows_appended", len(sires))
+        stats.count("generations")
+
+        with stats.phase("metrics", self.pedigree.nrm):
+            top_male_ebv = self.pedigree.ebv[np.array(top_males, dtype=np.int64) - offset]
+            top_female_ebv = self.pedigree.ebv[np.array(top_females, dtype=np.int64) - offset]
+
+            # intensity is averaged over both sexes, as each contributes half of the genes
+            intensity = np.array(
+                [
+                    selection_intensity(male_ebv, top_male_ebv),
+                    selection_intensity(female_ebv, top_female_ebv),
                 ]
+            )
+            intensity = intensity[~np.isnan(intensity)].mean() if not np.isnan(intensity).all() else np.nan
+            self.metrics.record(
+                self.gen,
+                ebvs,
+                self.pedigree.nrm.inbreeding()[len(self.pedigree) - len(ebvs) :],
+                coancestry=mean_coancestry(self.pedigree.nrm, top_males + top_females),
+                intensity=intensity,
+            )
+
+        if self._store is not None:
+            with stats.phase("spill"):
+                self.pedigree.spill(self._store, len(self.pedigree) - len(sires))
+
+        with stats.phase("data"):
+            data = self.pedigree.tail(len(self.pedigree) - len(sires))
+
+        return data
+
+    def _record_metrics(self):
+        """Records statistics of the generations up to the latest one that have not been recorded while breeding."""
+
+        if len(self.metrics) > self.gen:
+            return
+
+        inbreeding = self.pedigree.nrm.inbreeding()
+        while len(self.metrics) <= self.gen:
+            # generations are only spilled once recorded
+            mask = self.pedigree.gen == len(self.metrics)
+            self.metrics.record(len(self.metrics), self.pedigree.ebv[mask[self.pedigree.spilled :]], inbreeding[mask])
 
-        self.pedigree = Pedigree(new_pedigree_data)
+    def history(self):
+        """Returns summary statistics of each generation.
 
-        return new_pedigree_data
+        Statistics are recorded as each generation is bred, so reading them does not recompute anything. Generations
+        not bred by this instance, such as the initial one or those of a loaded checkpoint, are summarized from the
+        pedigree and have no selection statistics. Inbreeding and coancestry are taken from the whole pedigree, even
+        when relationships used for selection are limited to a window.
+
+        Returns:
+            A dataframe indexed by generation number with the number of animals, mean and variance of EBV, mean and
+            maximum inbreeding coefficient, mean coancestry of the selected parents, selection intensity and
+            effective population size of each generation.
+        """
+
+        self._record_metrics()
+
+        return self.metrics.to_frame()
 
     def plot_inbreeding_by_gen(self):
         """Plot average inbreeding coefficients by generation.
 
-        Average inbreeding coefficients by generation is calculated and displayed as a basic line graph. All
-        generations that have been generated in a Simulator instance is displayed.
+        Average inbreeding coefficients by generation is read from the history and displayed as a basic line graph.
+        All generations that have been generated in a Simulator instance is displayed. Requires matplotlib.
         """
-        gen = list(range(0, self.gen + 1))
-        avg_inbreeding = []
-
-        for i in range(self.gen + 1):
-            avg_inbreeding.append(get_avg_inbreeding(self.pedigree, i))
 
-        plt.plot(gen, avg_inbreeding)
-        plt.xticks(np.arange(0, self.gen + 1, 1))
-        plt.xlabel("Generation")
-        plt.ylabel("Inbreeding Coefficient")
-        plt.title("Average Inbreeding Coefficient by Generation")
-        plt.show()
+        optional_import("pynrm.plotting", "plot").plot_inbreeding_by_gen(self.history())
 
     def plot_ebv_by_gen(self):
         """Plot average EBV by generation.
 
-        Average EBV by generation is calculated and displayed as a basic line graph. All generations that have been
-        generated in a Simulator instance is displayed.
+        Average EBV by generation is read from the history and displayed as a basic line graph. All generations that
+        have been generated in a Simulator instance is displayed. Requires matplotlib.
         """
-        gen = list(range(0, self.gen + 1))
-        avg_ebv = []
-
-        for i in range(self.gen + 1):
-            avg_ebv.append(self.pedigree.get_avg_ebv(i))
 
-        plt.plot(gen, avg_ebv)
-        plt.xticks(np.arange(0, self.gen + 1, 1))
-        plt.xlabel("Generation")
-        plt.ylabel("Estimated Breeding Value")
-        plt.title("Average Estimated Breeding Value by Generation")
-        plt.show()
+        optional_import("pynrm.plotting", "plot").plot_ebv_by_gen(self.history())
 
-    def export_to_csv(self, filename):
+    def export_to_csv(self, filename, original_ids=False):
         """Exports generated pedigree data as csv.
 
         Writes pedigree data that have been generated in a Simulator instance to a comma-separated values (csv) file.
+        Spilled generations are read from the store and written one batch at a time.
 
         Args:
             filename: A name of the path object or file-like object to export to.
+            original_ids: A boolean indicating whether to write the original ids of an imported pedigree. Defaults to
+                False.
         """
-        self.pedigree.data.to_csv(filename)
+        if self.pedigree.store is None:
+            self.pedigree.to_frame(original_ids=original_ids).to_csv(filename)
+            return
+
+        for i, frame in enumerate(self.pedigree.iter_frames(original_ids=original_ids)):
+            frame.to_csv(filename, mode="w" if i == 0 else "a", header=i == 0)
+
+    def save(self, path):
+        """Saves a checkpoint of the simulation.
+
+        Writes the pedigree to a columnar store in the given directory along with the state of the simulator,
+        including parameters, generation number and random state. When the simulator was last saved to or loaded
+        from the same directory, only the animals bred since are written. Records already saved are assumed not to
+        have changed. Original ids of an imported pedigree are saved as well. Selection and mating strategies and
+        relationships are not saved and are set again on the loaded simulator. Simulations with an evaluation cannot
+        be saved, since it rewrites EBV of all animals and its true breeding values and phenotypes are not part of the
+        checkpoint. Requires pyarrow.
+
+        Args:
+            path: A path of the directory to save to.
+        """
+
+        if self.evaluation is not None:
+            raise ValueError("simulations with an 'evaluation' cannot be saved")
+
+        store = optional_import("pynrm.store", "arrow").ColumnStore(os.path.join(path, "pedigree"))
+        path = os.path.abspath(path)
+
+        # a checkpoint of another run is replaced as a whole
+        if self._checkpoint != path:
+            store.clear()
+        start = len(store)
+        if start > len(self.pedigree):
+            raise ValueError("'path' holds a checkpoint of a later generation")
+
+        if start < len(self.pedigree):
+            # records of spilled animals are read back from the spill store
+            records = self.pedigree._records(np.arange(start, len(self.pedigree)), ["ebv", "sex"])
+            store.append(
+                {
+                    "gen": self.pedigree.gen[start:],
+                    "sire": self.pedigree.sire[start:],
+                    "dam": self.pedigree.dam[start:],
+                    "ebv": records["ebv"],
+                    "sex": records["sex"],
+                }
+            )
+
+        # original ids may be strings or numbers, so they are kept apart from the columns and rewritten as a whole
+        labels = os.path.join(path, "original_ids.json")
+        if self.pedigree.original_ids is None:
+            if os.path.exists(labels):
+                os.remove(labels)
+        else:
+            with open(labels + ".tmp", "w") as file:
+                json.dump(self.pedigree.original_ids, file, default=lambda value: np.asarray(value).item())
+            os.replace(labels + ".tmp", labels)
+
+        state = {
+            "gen": self.gen,
+            "male_k": self.male_k,
+            "female_k": self.female_k,
+            "h": self.h,
+            "w": self.w,
+            "nrm_window": self.nrm_window,
+            "carry_base": self.carry_base,
+            "spill": self.spill,
+            "rng": self.rng.bit_generator.state,
+        }
+        with open(os.path.join(path, "state.json.tmp"), "w") as file:
+            json.dump(state, file)
+        os.replace(os.path.join(path, "state.json.tmp"), os.path.join(path, "state.json"))
+
+        self._checkpoint = path
+
+    @classmethod
+    def load(cls, path):
+        """Loads a simulation from a checkpoint.
+
+        Reads the pedigree columns of the checkpoint, which are copied into the growable buffers of a new pedigree so
+        that it can be bred further, along with its original ids, and restores the state of the simulator, so the
+        simulation resumes exactly where it was saved. Requires pyarrow.
+
+        Args:
+            path: A path of the directory to load from.
+
+        Returns:
+            An instance of Simulator class with the saved pedigree and state.
+        """
+
+        ColumnStore = optional_import("pynrm.store", "arrow").ColumnStore
+
+        with open(os.path.join(path, "state.json")) as file:
+            state = json.load(file)
+
+        columns = ColumnStore(os.path.join(path, "pedigree")).read()
+        pedigree = Pedigree.from_arrays(columns["gen"], columns["sire"], columns["dam"], columns["ebv"], columns["sex"])
+        labels = os.path.join(path, "original_ids.json")
+        if os.path.exists(labels):
+            with open(labels) as file:
+                pedigree.original_ids = json.load(file)
+
+        bit_generator = getattr(np.random, state["rng"]["bit_generator"])()
+        bit_generator.state = state["rng"]
+
+        simulator = cls(
+            pedigree,
+            state["male_k"],
+            state["female_k"],
+            state["h"],
+            state["w"],
+            rng=np.random.Generator(bit_generator),
+            nrm_window=state.get("nrm_window"),
+            carry_base=state.get("carry_base", False),
+            spill=state.get("spill"),
+        )
+        simulator.gen = state["gen"]
+        simulator._checkpoint = os.path.abspath(path)
+
+        return simulator
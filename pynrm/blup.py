@@ -0,0 +1,188 @@
+import numpy as np
+import scipy.sparse as sp
+from .nrm import build_nrm_inverse
+from .Pedigree import Pedigree
+
+
+def _pcg(matrix, rhs, x, tol, max_iter):
+    """Solves a symmetric positive definite system with the conjugate gradient method, preconditioned by the
+    diagonal of the matrix. Returns the solution and the number of iterations taken."""
+
+    inverse_diag = 1 / matrix.diagonal()
+    r = rhs - matrix @ x
+    z = inverse_diag * r
+    p = z.copy()
+    rz = r @ z
+    norm = np.linalg.norm(rhs)
+    if norm == 0:
+        return np.zeros_like(rhs), 0
+
+    for iteration in range(max_iter):
+        if np.linalg.norm(r) <= tol * norm:
+            return x, iteration
+        q = matrix @ p
+        alpha = rz / (p @ q)
+        x = x + alpha * p
+        r = r - alpha * q
+        z = inverse_diag * r
+        rz, previous = r @ z, rz
+        p = z + (rz / previous) * p
+
+    return x, max_iter
+
+
+def solve_animal_model(pedigree, phenotypes, h, x0=None, tol=1e-8, max_iter=1000):
+    """Solves the mixed model equations of an animal model.
+
+    Fits y = 1 * mu + a + e, with one phenotype per animal, breeding values a ~ N(0, A * h) and residuals
+    e ~ N(0, I * (1 - h)). The equations are set up with the sparse inverse of NRM, scaled by (1 - h) / h, and solved
+    with the conjugate gradient method preconditioned by their diagonal, so the cost of each iteration is linear in
+    the size of the pedigree. A previous solution can be given to start from.
+
+    Args:
+        pedigree: An instance of Pedigree class holding the recorded ancestry data.
+        phenotypes: An array of floats indicating the phenotype of each animal.
+        h: A float indicating heritability value.
+        x0: An array of floats indicating the starting solution, the mean followed by the breeding value of each
+            animal. Defaults to None for zeros.
+        tol: A float indicating the tolerance of the residual relative to the right-hand side. Defaults to 1e-8.
+        max_iter: An integer count of iterations allowed. Defaults to 1000.
+
+    Returns:
+        A tuple of an array of floats, the estimated mean followed by the estimated breeding value of each animal,
+        and the integer count of iterations taken.
+    """
+
+    if not isinstance(pedigree, Pedigree):
+        raise TypeError("'pedigree' must be of type Pedigree")
+    if not isinstance(h, float):
+        raise TypeError("'h' must be of type float")
+
+    n = len(pedigree)
+    phenotypes = np.asarray(phenotypes, dtype=np.float64)
+    if phenotypes.shape != (n,):
+        raise ValueError("'phenotypes' must have a value for each animal")
+    if h <= 0 or h > 1:
+        raise ValueError("'h' must be between 0 and 1")
+
+    # coefficient matrix [[1'1, 1'], [1, I + A^-1 * (1 - h) / h]] of the mean and breeding values
+    ones = sp.csr_matrix(np.ones((n, 1)))
+    lhs = sp.bmat(
+        [
+            [sp.csr_matrix([[n]]), ones.T],
+            [ones, sp.identity(n, format="csr") + build_nrm_inverse(pedigree) * ((1 - h) / h)],
+        ],
+        format="csr",
+    )
+    rhs = np.concatenate([[phenotypes.sum()], phenotypes])
+
+    x = np.zeros(n + 1) if x0 is None else np.asarray(x0, dtype=np.float64)
+    if x.shape != (n + 1,):
+        raise ValueError("'x0' must have a value for the mean and each animal")
+
+    return _pcg(lhs, rhs, x, tol, max_iter)
+
+
+class BlupEvaluation:
+    """Estimates breeding values from simulated phenotypes with BLUP.
+
+    True breeding values are kept apart from EBV of the pedigree. Each new animal inherits the average true
+    breeding value of its parents plus a Mendelian sampling term with variance h * (1 - f) / 2, where f is the
+    average inbreeding coefficient of the parents, and is given a phenotype by adding a residual with variance
+    1 - h. EBV of all animals are then estimated with an animal model, starting the solver from the previous
+    solution. True breeding values of the animals of the initial pedigree are their EBV scaled by the square root
+    of h, so that additive variance is h and phenotypic variance is 1 throughout, as the model assumes.
+
+    Attributes:
+        tol: A float indicating the tolerance of the solver.
+        max_iter: An integer count of iterations allowed to the solver.
+        tbv: An array of floats indicating the true breeding value of each animal.
+        phenotypes: An array of floats indicating the phenotype of each animal.
+        solution: An array of floats indicating the last solution, the mean followed by EBV of each animal.
+        iterations: An integer count of iterations taken by the last evaluation.
+    """
+
+    def __init__(self, tol=1e-8, max_iter=1000):
+        """Initializes the instance without any records.
+
+        Args:
+            tol: Defines tol value. Defaults to 1e-8.
+            max_iter: Defines max_iter value. Defaults to 1000.
+        """
+
+        if not isinstance(tol, float):
+            raise TypeError("'tol' must be of type float")
+        if not isinstance(max_iter, int):
+            raise TypeError("'max_iter' must be of type int")
+
+        if tol <= 0:
+            raise ValueError("'tol' must be positive")
+        if max_iter < 1:
+            raise ValueError("'max_iter' must be positive")
+
+        self.tol = tol
+        self.max_iter = max_iter
+        self.tbv = np.empty(0)
+        self.phenotypes = np.empty(0)
+        self.solution = np.zeros(1)
+        self.iterations = 0
+
+    def _record(self, simulator, tbv):
+        residual = simulator.rng.normal(0, 1, size=len(tbv)) * np.sqrt(1 - simulator.h)
+        self.tbv = np.concatenate([self.tbv, tbv])
+        self.phenotypes = np.concatenate([self.phenotypes, tbv + residual])
+
+    def breed(self, simulator, sires, dams):
+        """Draws true breeding values and phenotypes of a batch of new animals.
+
+        Args:
+            simulator: An instance of Simulator class running the simulation.
+            sires: An array of integers indicating the sire ids.
+            dams: An array of integers indicating the dam ids, paired with the sire ids.
+
+        Returns:
+            An array of floats that corresponds to the true breeding value of each new animal.
+        """
+
+        # animals recorded before the evaluation started take their EBV, drawn with unit variance, as true values
+        # with additive variance h
+        start = len(self.tbv)
+        if start < len(simulator.pedigree):
+            self._record(simulator, simulator.pedigree.ebv[start:] * np.sqrt(simulator.h))
+
+        sires = np.asarray(sires, dtype=np.int64)
+        dams = np.asarray(dams, dtype=np.int64)
+        inbreeding = simulator.nrm.inbreeding()
+        f = 0.5 * (inbreeding[sires] + inbreeding[dams])
+        sd = np.sqrt(simulator.h * (1 - f) / 2)
+        tbv = 0.5 * (self.tbv[sires] + self.tbv[dams]) + simulator.rng.normal(0, 1, size=len(sires)) * sd
+        self._record(simulator, tbv)
+
+        return tbv
+
+    def evaluate(self, pedigree, h):
+        """Estimates breeding values of all animals from their phenotypes.
+
+        Animals added since the last evaluation start from the average solution of their parents.
+
+        Args:
+            pedigree: An instance of Pedigree class holding the recorded ancestry data.
+            h: A float indicating heritability value.
+
+        Returns:
+            An array of floats that corresponds to EBV of each animal.
+        """
+
+        n = len(pedigree)
+        x = np.zeros(n + 1)
+        start = len(self.solution) - 1
+        x[: start + 1] = self.solution
+        sire = pedigree.sire[start:]
+        dam = pedigree.dam[start:]
+        x[start + 1 :] = 0.5 * (np.where(sire >= 0, x[sire + 1], 0) + np.where(dam >= 0, x[dam + 1], 0))
+
+        self.solution, self.iterations = solve_animal_model(
+            pedigree, self.phenotypes, h, x0=x, tol=self.tol, max_iter=self.max_iter
+        )
+
+        return self.solution[1:]
@@ -0,0 +1,222 @@
+import argparse
+import csv
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+from .metrics import MetricsCollector
+from .optional import optional_import
+from .Pedigree import Pedigree
+from .Simulator import Simulator
+
+DEFAULTS = {
+    "name": None,
+    "male_size": 500,
+    "female_size": 500,
+    "male_k": None,
+    "female_k": None,
+    "h": None,
+    "w": 0.0,
+    "generations": 10,
+    "replicates": 1,
+    "seed": None,
+    "nrm_window": None,
+}
+
+COLUMNS = ["scenario", "replicate", "gen"] + list(MetricsCollector.COLUMNS)
+
+
+def load_scenarios(path):
+    """Reads scenarios from a TOML or YAML file.
+
+    The file either holds the parameters of a single scenario at the top level or a list of scenarios under the
+    scenarios key. Parameters are male_size, female_size, male_k, female_k, h, w, generations, replicates, seed,
+    nrm_window and name. male_k, female_k and h are required.
+
+    Args:
+        path: A path of the scenario file, read as YAML when its extension is .yaml or .yml and as TOML otherwise.
+
+    Returns:
+        A list of dictionaries holding the parameters of each scenario, with defaults filled in.
+    """
+
+    if os.path.splitext(path)[1] in (".yaml", ".yml"):
+        with open(path) as file:
+            config = optional_import("yaml", "yaml").safe_load(file)
+    else:
+        try:
+            import tomllib
+        except ImportError:
+            # tomllib is only part of the standard library from Python 3.11
+            import tomli as tomllib
+
+        with open(path, "rb") as file:
+            config = tomllib.load(file)
+
+    if not isinstance(config, dict):
+        raise ValueError("scenario file must hold a table of parameters")
+
+    scenarios = config.get("scenarios", [config])
+    if not isinstance(scenarios, list):
+        raise ValueError("'scenarios' must be a list")
+
+    result = []
+    for i, scenario in enumerate(scenarios):
+        unknown = set(scenario) - set(DEFAULTS)
+        if unknown:
+            raise ValueError("unknown scenario parameters: {}".format(", ".join(sorted(unknown))))
+        scenario = {**DEFAULTS, **scenario}
+        for key in ("male_k", "female_k", "h"):
+            if scenario[key] is None:
+                raise ValueError("scenario is missing '{}'".format(key))
+        if scenario["name"] is None:
+            scenario["name"] = "scenario-{}".format(i)
+        scenario["h"] = float(scenario["h"])
+        scenario["w"] = float(scenario["w"])
+        result.append(scenario)
+
+    return result
+
+
+def _run(scenario, replicate, seed):
+    """Runs a replicate of a scenario and returns its history along with the number of animals bred and the time
+    taken."""
+
+    start = time.perf_counter()
+    rng = np.random.default_rng(seed)
+    simulator = Simulator(
+        Pedigree(male_size=scenario["male_size"], female_size=scenario["female_size"], rng=rng),
+        scenario["male_k"],
+        scenario["female_k"],
+        scenario["h"],
+        scenario["w"],
+        rng=rng,
+        nrm_window=scenario["nrm_window"],
+    )
+    initial = len(simulator.pedigree)
+    for _ in range(scenario["generations"]):
+        simulator.reproduce()
+
+    history = simulator.history().reset_index()
+    history.insert(0, "replicate", replicate)
+    history.insert(0, "scenario", scenario["name"])
+
+    return history, len(simulator.pedigree) - initial, time.perf_counter() - start
+
+
+class _Writer:
+    """Appends rows of results to a CSV or Parquet file as they come."""
+
+    def __init__(self, path):
+        self.path = path
+        self._parquet = os.path.splitext(path)[1] == ".parquet"
+        self._writer = None
+        self._file = None
+
+    def write(self, frame):
+        frame = frame[COLUMNS]
+        if self._parquet:
+            pa = optional_import("pyarrow", "arrow")
+            pq = optional_import("pyarrow.parquet", "arrow")
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            if self._writer is None:
+                self._writer = pq.ParquetWriter(self.path, table.schema)
+            self._writer.write_table(table)
+        else:
+            if self._file is None:
+                self._file = open(self.path, "w", newline="")
+                self._writer = csv.writer(self._file)
+                self._writer.writerow(COLUMNS)
+            self._writer.writerows(frame.itertuples(index=False))
+            self._file.flush()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+        elif self._writer is not None:
+            self._writer.close()
+
+
+def run(scenarios, output, workers=None, progress=sys.stderr):
+    """Runs all replicates of the scenarios and writes the statistics of each generation.
+
+    Replicates are run on a pool of worker processes, each with its own random Generator spawned from the seed of
+    its scenario. Results of each replicate are written as soon as it completes, and progress is reported with the
+    number of animals bred per second and generations per minute.
+
+    Args:
+        scenarios: A list of dictionaries holding the parameters of each scenario, as returned by load_scenarios.
+        output: A path of the results file, written as Parquet when its extension is .parquet and as CSV otherwise.
+        workers: An integer count of worker processes. Defaults to None for the number of processors. Replicates are
+            run in the current process when set to 1.
+        progress: A file-like object to report progress to, or None for no progress. Defaults to sys.stderr.
+    """
+
+    tasks = []
+    for scenario in scenarios:
+        seeds = np.random.SeedSequence(scenario["seed"]).spawn(scenario["replicates"])
+        tasks += [(scenario, replicate, seed) for replicate, seed in enumerate(seeds)]
+
+    writer = _Writer(output)
+    start = time.perf_counter()
+    animals = 0
+    generations = 0
+
+    def report(done, history, bred):
+        nonlocal animals, generations
+        writer.write(history)
+        animals += bred
+        generations += len(history) - 1
+        if progress is not None:
+            elapsed = max(time.perf_counter() - start, 1e-9)
+            print(
+                "[{}/{}] {} replicate {}: {:.0f} animals/s, {:.1f} generations/min".format(
+                    done,
+                    len(tasks),
+                    history["scenario"].iloc[0],
+                    history["replicate"].iloc[0],
+                    animals / elapsed,
+                    60 * generations / elapsed,
+                ),
+                file=progress,
+            )
+
+    try:
+        if workers == 1:
+            for done, task in enumerate(tasks, 1):
+                history, bred, _ = _run(*task)
+                report(done, history, bred)
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = [executor.submit(_run, *task) for task in tasks]
+                for done, future in enumerate(as_completed(futures), 1):
+                    history, bred, _ = future.result()
+                    report(done, history, bred)
+    finally:
+        writer.close()
+
+
+def main(argv=None):
+    """Runs the command-line interface.
+
+    Args:
+        argv: A list of command-line arguments. Defaults to None for sys.argv.
+    """
+
+    parser = argparse.ArgumentParser(prog="pynrm", description="Run breeding simulation scenarios.")
+    parser.add_argument("config", help="TOML or YAML scenario file")
+    parser.add_argument("-o", "--output", default="results.csv", help="results file, .csv or .parquet")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="number of worker processes")
+    parser.add_argument("-q", "--quiet", action="store_true", help="do not report progress")
+    args = parser.parse_args(argv)
+
+    if args.workers is not None and args.workers < 1:
+        parser.error("'workers' must be positive")
+
+    try:
+        scenarios = load_scenarios(args.config)
+    except (OSError, ValueError) as error:
+        parser.error(str(error))
+
+    run(scenarios, args.output, workers=args.workers, progress=None if args.quiet else sys.stderr)
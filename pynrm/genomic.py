@@ -0,0 +1,211 @@
+import os
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from .nrm import build_nrm_inverse, nrm_block
+from .Pedigree import Pedigree
+
+
+def _open_genotypes(genotypes):
+    """Returns the genotype matrix of an array or a memory-mapped .npy file."""
+
+    if isinstance(genotypes, (str, os.PathLike)):
+        genotypes = np.load(genotypes, mmap_mode="r")
+    if not isinstance(genotypes, np.ndarray):
+        raise TypeError("'genotypes' must be of type ndarray or a path to a .npy file")
+    if genotypes.ndim != 2:
+        raise ValueError("'genotypes' must be a matrix of animals by markers")
+
+    return genotypes
+
+
+def read_raw(path, out, chunksize=1000):
+    """Converts a PLINK .raw file into a .npy file.
+
+    The .raw file, as written by plink --recodeA, holds one animal per line with six leading columns (FID, IID, PAT,
+    MAT, SEX, PHENOTYPE) followed by allele counts coded 0, 1 or 2, and NA for missing genotypes. Lines are read in
+    chunks and written into a memory-mapped .npy file, so the genotypes never sit in memory as a whole. Missing
+    genotypes are stored as NaN.
+
+    Args:
+        path: A path of the .raw file.
+        out: A path of the .npy file to write.
+        chunksize: An integer count of animals to read at a time. Defaults to 1000.
+
+    Returns:
+        A list of the IID of each animal, in the order of the rows of the written matrix.
+    """
+
+    if not isinstance(chunksize, int):
+        raise TypeError("'chunksize' must be of type int")
+
+    if chunksize < 1:
+        raise ValueError("'chunksize' must be positive")
+
+    with open(path) as file:
+        n = sum(1 for _ in file) - 1
+        file.seek(0)
+        m = len(file.readline().split()) - 6
+
+    matrix = np.lib.format.open_memmap(out, mode="w+", dtype=np.float32, shape=(n, m))
+    iids = []
+    start = 0
+    for chunk in pd.read_csv(path, sep=r"\s+", chunksize=chunksize, dtype={"FID": str, "IID": str}):
+        iids += chunk["IID"].tolist()
+        matrix[start : start + len(chunk)] = chunk.iloc[:, 6:].to_numpy(dtype=np.float32)
+        start += len(chunk)
+    matrix.flush()
+
+    return iids
+
+
+def build_g(genotypes, chunksize=10000, dtype=np.float64):
+    """Builds the genomic relationship matrix (G) of VanRaden (2008).
+
+    G = ZZ' / (2 * sum(p * (1 - p))), where Z holds the allele counts centered by twice the allele frequency p of
+    each marker. Markers are read in blocks of columns, each block adding its ZZ' to the result, so only one block
+    of genotypes is in memory at a time when they are memory-mapped. Missing genotypes are set to the mean of their
+    marker.
+
+    Args:
+        genotypes: A matrix of allele counts coded 0, 1 or 2, with a row for each animal and a column for each
+            marker, or a path to a .npy file holding it, which is memory-mapped.
+        chunksize: An integer count of markers to read at a time. Defaults to 10000.
+        dtype: A numpy float dtype to compute in, either float32 or float64. Defaults to float64.
+
+    Returns:
+        A dense array of the given dtype that corresponds to G.
+    """
+
+    genotypes = _open_genotypes(genotypes)
+    if not isinstance(chunksize, int):
+        raise TypeError("'chunksize' must be of type int")
+
+    dtype = np.dtype(dtype)
+    if dtype not in (np.float32, np.float64):
+        raise ValueError("'dtype' must be either float32 or float64")
+    if chunksize < 1:
+        raise ValueError("'chunksize' must be positive")
+
+    n, m = genotypes.shape
+    g = np.zeros((n, n), dtype=dtype)
+    scale = 0.0
+    for start in range(0, m, chunksize):
+        block = np.asarray(genotypes[:, start : start + chunksize], dtype=dtype)
+        missing = np.isnan(block)
+        count = (~missing).sum(axis=0)
+        p = np.divide(
+            np.where(missing, 0, block).sum(axis=0), 2 * count, out=np.zeros(block.shape[1], dtype), where=count > 0
+        )
+        z = np.where(missing, 0, block - 2 * p)
+        g += z @ z.T
+        scale += 2 * float(np.sum(p * (1 - p)))
+
+    if scale == 0:
+        raise ValueError("'genotypes' has no polymorphic markers")
+
+    return g / scale
+
+
+def build_h_inverse(pedigree, genotyped, g, alpha=0.05):
+    """Builds the inverse of the single-step relationship matrix (H).
+
+    H-inverse is A-inverse with G-inverse minus A22-inverse added to the block of the genotyped animals, where A22
+    is the NRM block of the genotyped animals (Aguilar et al., 2010). G is blended with A22 as (1 - alpha) * G +
+    alpha * A22 so that it is invertible and on the scale of the pedigree.
+
+    Args:
+        pedigree: An instance of Pedigree class holding the recorded ancestry data.
+        genotyped: A list of integers indicating the genotyped animals, in the order of the rows and columns of g.
+        g: A dense array that corresponds to G of the genotyped animals.
+        alpha: A float indicating the weight of A22 in the blended G. Defaults to 0.05.
+
+    Returns:
+        A scipy sparse matrix in CSR format that corresponds to the inverse of H.
+    """
+
+    if not isinstance(pedigree, Pedigree):
+        raise TypeError("'pedigree' must be of type Pedigree")
+    if not isinstance(alpha, float):
+        raise TypeError("'alpha' must be of type float")
+
+    genotyped = np.asarray(genotyped, dtype=np.int64)
+    g = np.asarray(g, dtype=np.float64)
+    if g.shape != (len(genotyped), len(genotyped)):
+        raise ValueError("'g' must be a square matrix of the genotyped animals")
+    if alpha < 0 or alpha > 1:
+        raise ValueError("'alpha' must be between 0 and 1")
+
+    a22 = nrm_block(pedigree, genotyped, genotyped)
+    blended = (1 - alpha) * g + alpha * a22
+    block = np.linalg.inv(blended) - np.linalg.inv(a22)
+
+    rows = np.repeat(genotyped, len(genotyped))
+    cols = np.tile(genotyped, len(genotyped))
+    n = len(pedigree)
+
+    return (build_nrm_inverse(pedigree) + sp.csr_matrix((block.ravel(), (rows, cols)), shape=(n, n))).tocsr()
+
+
+class GenomicRelationship:
+    """Provides relationships from G where animals are genotyped and from NRM otherwise.
+
+    Answers the same get and row queries as NrmEngine, so it can replace the pedigree relationships used by
+    Simulator to penalize related candidates during selection.
+
+    Attributes:
+        g: A dense array that corresponds to G of the genotyped animals.
+        ids: An array of integers indicating the genotyped animals, in the order of the rows and columns of g.
+        fallback: An instance of NrmEngine class answering queries involving animals without genotypes. Set by
+            Simulator to its own engine.
+    """
+
+    def __init__(self, g, ids, fallback=None):
+        """Initializes the instance with G of the genotyped animals.
+
+        Args:
+            g: Defines g value.
+            ids: Defines ids value.
+            fallback: Defines fallback value. Defaults to None.
+        """
+
+        g = np.asarray(g, dtype=np.float64)
+        ids = np.asarray(ids, dtype=np.int64)
+        if g.shape != (len(ids), len(ids)):
+            raise ValueError("'g' must be a square matrix of the genotyped animals")
+
+        self.g = g
+        self.ids = ids
+        self.fallback = fallback
+        self._pos = dict(zip(ids.tolist(), range(len(ids))))
+
+    def get(self, i, j):
+        """Returns the relationship between two animals.
+
+        Args:
+            i: An integer indicating the row.
+            j: An integer indicating the column.
+
+        Returns:
+            A float that corresponds to the value of G when both animals are genotyped, or of NRM otherwise.
+        """
+
+        pos_i = self._pos.get(i)
+        pos_j = self._pos.get(j)
+        if pos_i is None or pos_j is None:
+            return self.fallback.get(i, j)
+
+        return round(float(self.g[pos_i, pos_j]), 3)
+
+    def row(self, i, cols):
+        """Returns the relationships between an animal and each of the given animals.
+
+        Args:
+            i: An integer indicating the row.
+            cols: A list of integers indicating the columns.
+
+        Returns:
+            An array of floats that corresponds to the relationship of i with each animal in cols.
+        """
+
+        return np.array([self.get(i, j) for j in cols], dtype=np.float64)
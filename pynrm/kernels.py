@@ -0,0 +1,139 @@
+import importlib.util
+import numpy as np
+from .optional import optional_import
+
+BACKENDS = ("auto", "numpy", "numba")
+
+_compiled = {}
+
+
+def resolve_backend(backend):
+    """Resolves a backend selector to the backend that will run the kernels.
+
+    Args:
+        backend: A string, either "auto", "numpy" or "numba". "auto" picks numba when it is installed and numpy
+            otherwise.
+
+    Returns:
+        A string, either "numpy" or "numba".
+    """
+
+    if not isinstance(backend, str):
+        raise TypeError("'backend' must be of type str")
+
+    if backend not in BACKENDS:
+        raise ValueError("'backend' must be one of {}".format(", ".join(BACKENDS)))
+
+    available = importlib.util.find_spec("numba") is not None
+    if backend == "auto":
+        return "numba" if available else "numpy"
+    if backend == "numba" and not available:
+        raise ImportError("the numba backend requires numba, which is not installed")
+
+    return backend
+
+
+def jit(kernel):
+    """Returns a kernel compiled with numba, compiling it on first use.
+
+    Args:
+        kernel: One of the kernel functions of this module.
+
+    Returns:
+        The compiled kernel, taking the same arguments.
+    """
+
+    compiled = _compiled.get(kernel)
+    if compiled is None:
+        numba = optional_import("numba", "numba")
+        compiled = _compiled[kernel] = numba.njit(cache=True, nogil=True)(kernel)
+
+    return compiled
+
+
+def inbreeding_kernel(sire, dam, f, d, start):
+    """Fills in inbreeding coefficients and Mendelian sampling variances from the given animal onwards.
+
+    Implements the algorithm of Meuwissen and Luo (1992), which is only fast once compiled, as it takes a step for
+    every ancestor visited by each animal. For each animal, the contributions of its ancestors are propagated from the
+    youngest to the oldest through a linked list kept in descending id order, and the diagonal of NRM is accumulated
+    from the ancestors' Mendelian sampling variances. Without numba, _inbreeding in pynrm.nrm computes the same
+    values level by level with NumPy instead.
+
+    Args:
+        sire: An int32 or int64 array of sire ids with -1 for unknown parents.
+        dam: An int32 or int64 array of dam ids with -1 for unknown parents.
+        f: A float64 array of inbreeding coefficients to fill in. Values before start must already be computed.
+        d: A float64 array of Mendelian sampling variances to fill in. Values before start must already be computed.
+        start: An integer indicating the first animal to compute.
+    """
+
+    n = len(sire)
+    contrib = np.zeros(n)
+    link = np.full(n, -1, dtype=np.int64)
+
+    for i in range(start, n):
+        s = sire[i]
+        m = dam[i]
+
+        # unknown parents count as having an inbreeding coefficient of -1
+        fs = f[s] if s >= 0 else -1.0
+        fm = f[m] if m >= 0 else -1.0
+        d[i] = 0.5 - 0.25 * (fs + fm)
+
+        if s < 0 or m < 0:
+            f[i] = 0.0
+            continue
+
+        # full sibs recorded one after another share the same coefficient
+        if i > 0 and s == sire[i - 1] and m == dam[i - 1]:
+            f[i] = f[i - 1]
+            continue
+
+        fi = -1.0
+        contrib[i] = 1.0
+        j = i
+        while j >= 0:
+            for parent in range(2):
+                p = sire[j] if parent == 0 else dam[j]
+                if p >= 0:
+                    # insert the parent into the ancestor list unless it is already there
+                    if contrib[p] == 0.0:
+                        k = j
+                        while link[k] > p:
+                            k = link[k]
+                        link[p] = link[k]
+                        link[k] = p
+                    contrib[p] += 0.5 * contrib[j]
+            fi += contrib[j] * contrib[j] * d[j]
+            contrib[j] = 0.0
+            k = link[j]
+            link[j] = -1
+            j = k
+        f[i] = fi
+
+
+def propagate_kernel(sire, dam, t):
+    """Propagates rows of T backwards from offspring to their parents in place.
+
+    Each column of t starts with the unit contributions of some animals, and ends up with their rows of T in the
+    decomposition A = TDT'. Animals are visited in descending id order, which visits offspring before their parents.
+
+    Args:
+        sire: An int32 or int64 array of sire ids with -1 for unknown parents.
+        dam: An int32 or int64 array of dam ids with -1 for unknown parents.
+        t: A float array with a row for each animal and a column for each row of T to propagate.
+    """
+
+    for j in range(len(sire) - 1, -1, -1):
+        s = sire[j]
+        m = dam[j]
+        if s < 0 and m < 0:
+            continue
+        for c in range(t.shape[1]):
+            half = 0.5 * t[j, c]
+            if half != 0.0:
+                if s >= 0:
+                    t[s, c] += half
+                if m >= 0:
+                    t[m, c] += half
@@ -0,0 +1,130 @@
+import numpy as np
+import scipy.sparse as sp
+from .nrm import nrm_block
+
+
+class MatingStrategy:
+    """Pairs the selected animals into matings.
+
+    Subclasses implement plan, which is called by Simulator.reproduce with the selected males and females. Each
+    mating produces one offspring.
+    """
+
+    def plan(self, simulator, sires, dams):
+        """Plans the matings of the selected animals.
+
+        Args:
+            simulator: An instance of Simulator class running the simulation.
+            sires: A list of integers indicating the selected males.
+            dams: A list of integers indicating the selected females.
+
+        Returns:
+            A tuple of two arrays of integers indicating the sire and the dam of each mating.
+        """
+
+        raise NotImplementedError
+
+
+class FactorialMating(MatingStrategy):
+    """Mates every selected male with every selected female."""
+
+    def plan(self, simulator, sires, dams):
+        return (
+            np.repeat(np.array(sires, dtype=np.int32), len(dams)),
+            np.tile(np.array(dams, dtype=np.int32), len(sires)),
+        )
+
+
+class MinimumCoancestryMating(MatingStrategy):
+    """Allocates matings to minimize inbreeding of the progeny.
+
+    Builds the NRM block between the selected sires and dams at once with nrm_block, and assigns each dam a number
+    of matings and each sire at most a number of matings so that the average inbreeding coefficient of the progeny,
+    half of the NRM value of its parents, is minimized. Since the cost of a mating only depends on its sire and dam,
+    the allocation is solved as a transportation problem over the number of matings of each pair with a linear
+    program, whose solution is integral as its constraint matrix is totally unimodular. A dam may be mated more than
+    once with the same sire.
+
+    Attributes:
+        offspring_per_dam: An integer count of matings of each dam, or None for as many as there are sires.
+        max_per_sire: An integer count of matings allowed for each sire, or None for an even share of all matings.
+        workers: An integer count of threads building the NRM block, or None for the default.
+    """
+
+    def __init__(self, offspring_per_dam=None, max_per_sire=None, workers=None):
+        """Initializes the instance with the constraints on matings.
+
+        Args:
+            offspring_per_dam: Defines offspring_per_dam value. Defaults to None, so that the progeny is as large as
+                with factorial mating.
+            max_per_sire: Defines max_per_sire value. Defaults to None.
+            workers: Defines workers value. Defaults to None.
+        """
+
+        if offspring_per_dam is not None and not isinstance(offspring_per_dam, int):
+            raise TypeError("'offspring_per_dam' must be of type int")
+        if max_per_sire is not None and not isinstance(max_per_sire, int):
+            raise TypeError("'max_per_sire' must be of type int")
+        if workers is not None and not isinstance(workers, int):
+            raise TypeError("'workers' must be of type int")
+
+        if offspring_per_dam is not None and offspring_per_dam < 1:
+            raise ValueError("'offspring_per_dam' must be positive")
+        if max_per_sire is not None and max_per_sire < 1:
+            raise ValueError("'max_per_sire' must be positive")
+
+        self.offspring_per_dam = offspring_per_dam
+        self.max_per_sire = max_per_sire
+        self.workers = workers
+
+    def allocate(self, nrm):
+        """Allocates matings from the NRM block between the sires and dams.
+
+        Args:
+            nrm: A dense array indicating the NRM value of each sire (rows) and dam (columns).
+
+        Returns:
+            A tuple of two arrays of integers indicating the position of the sire and of the dam of each mating.
+        """
+
+        nrm = np.asarray(nrm, dtype=np.float64)
+        n_sires, n_dams = nrm.shape
+        if n_sires == 0 or n_dams == 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+        per_dam = n_sires if self.offspring_per_dam is None else self.offspring_per_dam
+        total = per_dam * n_dams
+        per_sire = -(-total // n_sires) if self.max_per_sire is None else self.max_per_sire
+        if per_sire * n_sires < total:
+            raise ValueError("Not enough matings allowed for sires to mate every dam")
+
+        # scipy.optimize is slow to import, so it is only loaded when matings are allocated
+        from scipy.optimize import linprog
+
+        # a variable for the number of matings of each sire (major) and dam (minor), every dam mated per_dam times
+        # and every sire at most per_sire times
+        result = linprog(
+            nrm.ravel(),
+            A_ub=sp.kron(sp.identity(n_sires), np.ones((1, n_dams)), format="csr"),
+            b_ub=np.full(n_sires, per_sire),
+            A_eq=sp.kron(np.ones((1, n_sires)), sp.identity(n_dams), format="csr"),
+            b_eq=np.full(n_dams, per_dam),
+            bounds=(0, None),
+            method="highs-ds",
+        )
+        if result.status != 0:
+            raise ValueError("matings could not be allocated: {}".format(result.message))
+
+        # the simplex method ends on a vertex, which is integral, so rounding only removes numerical noise
+        counts = np.rint(result.x).astype(np.int64).reshape(n_sires, n_dams).T
+        dam_pos, sire_pos = np.nonzero(counts)
+        repeats = counts[dam_pos, sire_pos]
+
+        return np.repeat(sire_pos, repeats), np.repeat(dam_pos, repeats)
+
+    def plan(self, simulator, sires, dams):
+        sires = np.asarray(sires, dtype=np.int64)
+        dams = np.asarray(dams, dtype=np.int64)
+        sire_pos, dam_pos = self.allocate(nrm_block(simulator.pedigree, sires, dams, workers=self.workers))
+
+        return sires[sire_pos].astype(np.int32), dams[dam_pos].astype(np.int32)
@@ -0,0 +1,146 @@
+import numpy as np
+import pandas as pd
+
+
+class MetricsCollector:
+    """Collects summary statistics of each generation as it is produced.
+
+    Statistics are kept as rows of a float array that grows geometrically, so recording a generation costs the same
+    no matter how many have been recorded and reading the whole history costs O(generations).
+
+    Attributes:
+        COLUMNS: A tuple of the names of the recorded statistics.
+    """
+
+    COLUMNS = (
+        "size",
+        "ebv_mean",
+        "ebv_var",
+        "inbreeding_mean",
+        "inbreeding_max",
+        "coancestry",
+        "intensity",
+        "ne",
+    )
+
+    def __init__(self):
+        """Initializes the instance with an empty history."""
+
+        self._gen = np.empty(0, dtype=np.int64)
+        self._values = np.empty((0, len(self.COLUMNS)))
+        self._n = 0
+
+    def __len__(self):
+        return self._n
+
+    def record(self, gen, ebv, inbreeding, coancestry=np.nan, intensity=np.nan):
+        """Records the statistics of a generation.
+
+        The effective population size is derived from the rate of inbreeding since the last recorded generation as
+        1 / (2 * dF), where dF = (F_t - F_t-1) / (1 - F_t-1). It is left undefined when inbreeding did not increase.
+
+        Args:
+            gen: An integer indicating the generation number.
+            ebv: An array of floats indicating EBV of the animals of the generation.
+            inbreeding: An array of floats indicating inbreeding coefficients of the animals of the generation.
+            coancestry: A float indicating the mean coancestry of the parents selected to breed the generation.
+                Defaults to NaN.
+            intensity: A float indicating the selection intensity applied to breed the generation. Defaults to NaN.
+        """
+
+        if not isinstance(gen, int):
+            raise TypeError("'gen' must be of type int")
+
+        ebv = np.asarray(ebv, dtype=np.float64)
+        inbreeding = np.asarray(inbreeding, dtype=np.float64)
+        if len(ebv) != len(inbreeding):
+            raise ValueError("'ebv' and 'inbreeding' must have the same length")
+
+        size = len(ebv)
+        f = inbreeding.mean() if size > 0 else np.nan
+        ne = np.nan
+        if self._n > 0:
+            previous = self._values[self._n - 1, self.COLUMNS.index("inbreeding_mean")]
+            delta = (f - previous) / (1 - previous)
+            if delta > 0:
+                ne = 1 / (2 * delta)
+
+        row = (
+            size,
+            ebv.mean() if size > 0 else np.nan,
+            ebv.var() if size > 0 else np.nan,
+            f,
+            inbreeding.max() if size > 0 else np.nan,
+            coancestry,
+            intensity,
+            ne,
+        )
+
+        if self._n == len(self._gen):
+            capacity = max(1, 2 * self._n)
+            self._gen = np.resize(self._gen, capacity)
+            values = np.empty((capacity, len(self.COLUMNS)))
+            values[: self._n] = self._values[: self._n]
+            self._values = values
+
+        self._gen[self._n] = gen
+        self._values[self._n] = row
+        self._n += 1
+
+    def to_frame(self):
+        """Returns the history as a dataframe.
+
+        Returns:
+            A dataframe indexed by generation number with a column for each recorded statistic.
+        """
+
+        frame = pd.DataFrame(
+            self._values[: self._n].copy(),
+            columns=list(self.COLUMNS),
+            index=pd.Index(self._gen[: self._n].copy(), name="gen"),
+        )
+        frame["size"] = frame["size"].astype(np.int64)
+
+        return frame
+
+
+def mean_coancestry(nrm, ids):
+    """Returns the mean coancestry of a group of animals.
+
+    Coancestry of two animals is half of their NRM value, and the mean is taken over all pairs including each animal
+    with itself.
+
+    Args:
+        nrm: An instance of NrmEngine class to read NRM values from.
+        ids: A list of integers indicating the animals of the group.
+
+    Returns:
+        A float that corresponds to the mean coancestry of the group.
+    """
+
+    ids = [int(i) for i in ids]
+    if len(ids) == 0:
+        return np.nan
+
+    return float(sum(nrm.row(i, ids).sum() for i in ids) / (2 * len(ids) ** 2))
+
+
+def selection_intensity(candidates, selected):
+    """Returns the selection intensity of a selected group.
+
+    Intensity is the selection differential in units of the standard deviation of the candidates.
+
+    Args:
+        candidates: An array of floats indicating EBV of all candidates.
+        selected: An array of floats indicating EBV of the selected candidates.
+
+    Returns:
+        A float that corresponds to the selection intensity. NaN when the candidates do not vary.
+    """
+
+    candidates = np.asarray(candidates, dtype=np.float64)
+    selected = np.asarray(selected, dtype=np.float64)
+    if len(candidates) == 0 or len(selected) == 0 or candidates.std() == 0:
+        return np.nan
+
+    return float((selected.mean() - candidates.mean()) / candidates.std())
@@ -1,17 +1,695 @@
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
 import pandas as pd
+import scipy.sparse as sp
+from .kernels import inbreeding_kernel, jit, propagate_kernel, resolve_backend
 from .Pedigree import Pedigree
 
 
-def get_nrm(pedigree, i, j):
+class NrmEngine:
+    """Computes and caches numerator relationship matrix (NRM) values of a pedigree.
+
+    Each (i, j) value is traced up the pedigree only once and kept in a bounded cache, so repeated queries and
+    the shared ancestry between queries do not have to be recomputed. The least recently used values are evicted
+    once the cache is full. Since ancestors always precede their offspring, appending animals to the pedigree
+    never changes the values already cached.
+
+    The engine may be limited to a horizon of animals from a given id onwards. Parents before the horizon are
+    treated as unknown, so the animals at the start of the horizon act as founders, and animals before the horizon
+    are unrelated to any other animal. Relationships among those base animals can be supplied as a dense matrix
+    instead of treating them as unrelated.
+
+    Inbreeding coefficients are computed by a kernel compiled with numba when the numba backend is selected, or with
+    NumPy otherwise. Both give the same results.
+
+    Attributes:
+        pedigree: An instance of Pedigree class holding the recorded ancestry data.
+        maxsize: An integer count of NRM values to keep in the cache. None for an unbounded cache.
+        start: An integer indicating the first animal id within the horizon.
+        base: A dense array of NRM values among the animals from start onwards, or None when they are unrelated.
+        hits: An integer count of queries answered from the cache.
+        misses: An integer count of queries that had to be computed.
+        depth: An integer indicating the deepest recursion reached while computing values.
+        backend: A string indicating the backend computing inbreeding coefficients, either "numpy" or "numba".
+    """
+
+    def __init__(self, pedigree, maxsize=2**20, start=0, base=None, backend="auto"):
+        """Initializes the instance with an empty cache.
+
+        Args:
+            pedigree: Defines the pedigree to compute NRM values for.
+            maxsize: Defines maxsize value. Defaults to 2**20.
+            start: Defines start value. Defaults to 0.
+            base: Defines base value. Defaults to None.
+            backend: Defines backend value, either "auto", "numpy" or "numba". Defaults to "auto" for numba when it
+                is installed and numpy otherwise.
+        """
+
+        if not isinstance(pedigree, Pedigree):
+            raise TypeError("'pedigree' must be of type Pedigree")
+        if maxsize is not None and not isinstance(maxsize, int):
+            raise TypeError("'maxsize' must be of type int")
+        if not isinstance(start, int):
+            raise TypeError("'start' must be of type int")
+
+        if maxsize is not None and maxsize < 0:
+            raise ValueError("'maxsize' cannot be negative")
+        if start < 0:
+            raise ValueError("'start' cannot be negative")
+        if base is not None:
+            base = np.asarray(base, dtype=np.float64)
+            if base.ndim != 2 or base.shape[0] != base.shape[1] or start + len(base) > len(pedigree):
+                raise ValueError("'base' must be a square matrix of animals in the pedigree")
+
+        self.pedigree = pedigree
+        self.maxsize = maxsize
+        self.start = start
+        self.base = base
+        self.backend = resolve_backend(backend)
+        self.hits = 0
+        self.misses = 0
+        self.depth = 0
+        self._depth = 0
+        self._cache = OrderedDict()
+        self._f = np.empty(0)
+        self._d = np.empty(0)
+        self._levels = _Levels()
+
+    def __len__(self):
+        return len(self._cache)
+
+    def get(self, i, j):
+        """Returns the (i, j) value of NRM.
+
+        Looks the value up in the cache and computes it recursively from the values of the parents on a miss.
+
+        Args:
+            i: An integer indicating the row.
+            j: An integer indicating the column.
+
+        Returns:
+            A float that corresponds to the (i, j) value of NRM.
+        """
+
+        # NRM is symmetric, so values are cached with the smaller id first
+        if i > j:
+            i, j = j, i
+        key = (i, j)
+
+        res = self._cache.get(key)
+        if res is not None:
+            self.hits += 1
+            self._cache.move_to_end(key)
+            return res
+        self.misses += 1
+
+        # animals before the horizon count as founders, unrelated to any other animal
+        if i < self.start:
+            return 1.0 if i == j else 0.0
+
+        # relationships among base animals are given
+        if self.base is not None and j < self.start + len(self.base):
+            return float(self.base[i - self.start, j - self.start])
+
+        self._depth += 1
+        if self._depth > self.depth:
+            self.depth = self._depth
+
+        # get sire and dam of j from the pedigree, parents before the horizon are unknown
+        sire = int(self.pedigree.sire[j])
+        dam = int(self.pedigree.dam[j])
+        if sire < self.start:
+            sire = -1
+        if dam < self.start:
+            dam = -1
+
+        # diagonal - i and j is the same
+        if i == j:
+            if sire >= 0 and dam >= 0:
+                res = 1 + 0.5 * self.get(sire, dam)
+            else:
+                res = 1
+
+        # off-diagonal - i and j is not the same
+        else:
+            if sire >= 0 and dam >= 0:
+                res = 0.5 * (self.get(sire, i) + self.get(dam, i))
+            elif sire >= 0:
+                res = 0.5 * self.get(sire, i)
+            elif dam >= 0:
+                res = 0.5 * self.get(dam, i)
+            else:
+                res = 0
+
+        self._depth -= 1
+        res = round(float(res), 3)
+        self._cache[key] = res
+        if self.maxsize is not None and len(self._cache) > self.maxsize:
+            self._cache.popitem(last=False)
+
+        return res
+
+    def row(self, i, cols):
+        """Returns the values of NRM between an animal and each of the given animals.
+
+        Args:
+            i: An integer indicating the row.
+            cols: A list of integers indicating the columns.
+
+        Returns:
+            An array of floats that corresponds to the (i, j) values of NRM for each j in cols.
+        """
+
+        return np.array([self.get(i, j) for j in cols], dtype=np.float64)
+
+    def inbreeding(self):
+        """Returns the inbreeding coefficients of all animals.
+
+        Coefficients are computed one depth level at a time from the rows of T of the parents, propagated with NumPy
+        at a cost of O(n * p) for n animals and p distinct pairs of parents, or with the algorithm of Meuwissen and
+        Luo (1992) compiled with numba. They are kept between calls along with the depth levels of the pedigree, so
+        only animals appended since the last call are computed. Animals before the horizon count as not inbred. With
+        relationships among base animals given, the algorithms do not apply and coefficients come from the diagonal
+        of NRM instead.
+
+        Returns:
+            A read-only array of floats that corresponds to the inbreeding coefficient of each animal.
+        """
+
+        n = len(self.pedigree)
+        start = len(self._f)
+        if start < n:
+            sire = np.where(self.pedigree.sire < self.start, -1, self.pedigree.sire)
+            dam = np.where(self.pedigree.dam < self.start, -1, self.pedigree.dam)
+            f = np.concatenate([self._f, np.zeros(n - start)])
+            d = np.concatenate([self._d, np.zeros(n - start)])
+            if self.base is not None:
+                for i in range(max(start, self.start), n):
+                    f[i] = self.get(i, i) - 1
+                fs = np.where(sire[start:] >= 0, f[sire[start:]], -1.0)
+                fm = np.where(dam[start:] >= 0, f[dam[start:]], -1.0)
+                d[start:] = 0.5 - 0.25 * (fs + fm)
+            elif self.backend == "numba":
+                jit(inbreeding_kernel)(sire, dam, f, d, start)
+            else:
+                _inbreeding(sire, dam, f, d, start, levels=self._levels)
+            self._f = f
+            self._d = d
+            self._f.flags.writeable = False
+            self._d.flags.writeable = False
+
+        return self._f
+
+    def variances(self):
+        """Returns the Mendelian sampling variances of all animals.
+
+        These are the diagonal of D in the decomposition A = TDT', relative to the additive genetic variance, and are
+        computed along with the inbreeding coefficients.
+
+        Returns:
+            A read-only array of floats that corresponds to the Mendelian sampling variance of each animal.
+        """
+
+        self.inbreeding()
+
+        return self._d
+
+    def invalidate(self, start=0):
+        """Drops cached values involving animals from the given id onwards.
+
+        Should be called when the records of existing animals change. Values between animals before the given id
+        are kept since they only depend on earlier animals.
+
+        Args:
+            start: An integer indicating the first animal id whose values are dropped. Defaults to 0.
+        """
+
+        if not isinstance(start, int):
+            raise TypeError("'start' must be of type int")
+
+        self._f = self._f[:start]
+        self._d = self._d[:start]
+        self._levels = _Levels()
+        if start <= 0:
+            self._cache.clear()
+        else:
+            # keys hold the larger id second, so it decides whether the value is affected
+            for key in [key for key in self._cache if key[1] >= start]:
+                del self._cache[key]
+
+
+def _inbreeding(sire, dam, f, d, start, tile=128, levels=None):
+    """Fills in inbreeding coefficients and Mendelian sampling variances from the given animal onwards.
+
+    Animals are computed one depth level at a time. The inbreeding coefficient of an animal is half of the
+    relationship between its parents, which is the sum over ancestors k of T[s, k] * T[d, k] * D[k] in the
+    decomposition A = TDT'. Rows of T of the parents of a level only involve earlier levels, whose Mendelian sampling
+    variances are already known, and are propagated with NumPy for a tile of distinct parent pairs at a time. Each
+    pair costs a pass over the earlier levels, so the whole pedigree costs O(n * p) for n animals and p distinct
+    pairs of parents, instead of a Python step for every ancestor visited by each animal.
+
+    Args:
+        sire: An array of sire ids with -1 for unknown parents.
+        dam: An array of dam ids with -1 for unknown parents.
+        f: An array of inbreeding coefficients to fill in. Values before start must already be computed.
+        d: An array of Mendelian sampling variances to fill in. Values before start must already be computed.
+        start: An integer indicating the first animal to compute.
+        tile: An integer count of parent pairs to propagate at a time. Defaults to 128.
+        levels: An instance of _Levels class kept from previous calls over the leading animals of the pedigree.
+            Defaults to None for a new one.
+    """
+
+    sire = np.asarray(sire, dtype=np.int64)
+    dam = np.asarray(dam, dtype=np.int64)
+    n = len(sire)
+    if levels is None:
+        levels = _Levels()
+    levels.update(sire, dam)
+    level = levels.level
+    new = np.arange(start, n)
+
+    for depth in np.unique(level[start:]):
+        ids = new[level[start:] == depth]
+        s = sire[ids]
+        m = dam[ids]
+
+        # unknown parents count as having an inbreeding coefficient of -1
+        fs = np.where(s >= 0, f[s], -1.0)
+        fm = np.where(m >= 0, f[m], -1.0)
+        d[ids] = 0.5 - 0.25 * (fs + fm)
+        f[ids] = 0.0
+
+        both = (s >= 0) & (m >= 0)
+        if not both.any():
+            continue
+
+        # full sibs share their parents, so each pair of parents is only computed once
+        pairs, inverse = np.unique(np.stack([s[both], m[both]], axis=1), axis=0, return_inverse=True)
+        earlier = levels.bounds[depth]
+        d_earlier = d[levels.order[:earlier]]
+        a = np.empty(len(pairs))
+        for i in range(0, len(pairs), tile):
+            parents, pos = np.unique(levels.rank[pairs[i : i + tile]], return_inverse=True)
+            pos = pos.reshape(-1, 2)
+            t = np.zeros((earlier, len(parents)))
+            t[parents, np.arange(len(parents))] = 1
+            _propagate(levels.operators[:depth], t)
+            a[i : i + tile] = np.einsum("k,ki,ki->i", d_earlier, t[:, pos[:, 0]], t[:, pos[:, 1]])
+        f[ids[both]] = 0.5 * a[inverse.ravel()]
+
+
+class _Levels:
+    """Depth levels of a growing pedigree and the operators propagating rows of T over them.
+
+    Animals are ranked by depth level, so that the levels before any level are a leading block of ranks. Animals
+    appended to the deepest levels keep the ranks of existing animals, so only the operators of those levels are
+    rebuilt. Otherwise, all levels are rebuilt.
+
+    Attributes:
+        level: An array of integers indicating the depth level of each animal.
+        order: An array of animal ids in order of rank.
+        rank: An array of integers indicating the rank of each animal.
+        bounds: An array of integers indicating the first rank of each level, followed by the count of animals.
+        operators: A list of the operators of each level over ranks, as returned by _level_operators.
+    """
+
+    def __init__(self):
+        """Initializes the instance without any animals."""
+
+        self.level = np.zeros(0, dtype=np.int64)
+        self.order = np.zeros(0, dtype=np.int64)
+        self.rank = np.zeros(0, dtype=np.int64)
+        self.bounds = np.zeros(1, dtype=np.int64)
+        self.operators = []
+
+    def update(self, sire, dam):
+        """Adds the animals appended since the last update.
+
+        Args:
+            sire: An array of sire ids with -1 for unknown parents.
+            dam: An array of dam ids with -1 for unknown parents.
+        """
+
+        known = len(self.level)
+        n = len(sire)
+        if known == n:
+            return
+
+        level = _levels(sire, dam, self.level)
+        low = int(level[known:].min())
+        if known > 0 and low < self.level.max():
+            low = 0
+            order = np.concatenate(_level_blocks(level))
+            rank = np.empty(n, dtype=np.int64)
+            rank[order] = np.arange(n)
+        else:
+            order = np.concatenate([self.order, known + np.argsort(level[known:], kind="stable")])
+            rank = np.concatenate([self.rank, np.empty(n - known, dtype=np.int64)])
+            rank[order[known:]] = np.arange(known, n)
+        bounds = np.searchsorted(level[order], np.arange(level.max() + 2))
+
+        # only the levels from the shallowest rebuilt one onwards need parents by rank
+        sire_rank = np.full(n, -1, dtype=np.int64)
+        dam_rank = np.full(n, -1, dtype=np.int64)
+        tail = order[bounds[low] :]
+        sire_rank[bounds[low] :] = np.where(sire[tail] >= 0, rank[sire[tail]], -1)
+        dam_rank[bounds[low] :] = np.where(dam[tail] >= 0, rank[dam[tail]], -1)
+        blocks = [np.arange(bounds[i], bounds[i + 1]) for i in range(low, len(bounds) - 1)]
+
+        self.level = level
+        self.order = order
+        self.rank = rank
+        self.bounds = bounds
+        self.operators = self.operators[:low] + _level_operators(sire_rank, dam_rank, blocks)
+
+
+def _levels(sire, dam, known=None):
+    """Returns the depth of each animal in the pedigree, which is 0 for founders and one more than the deeper
+    parent otherwise. Depths already known for the leading animals can be given, so only the others are computed."""
+
+    level = np.zeros(len(sire), dtype=np.int64)
+    start = 0
+    if known is not None:
+        start = len(known)
+        level[:start] = known
+    sire = sire[start:]
+    dam = dam[start:]
+    while True:
+        level_sire = np.where(sire >= 0, level[sire] + 1, 0)
+        level_dam = np.where(dam >= 0, level[dam] + 1, 0)
+        new_level = np.maximum(level_sire, level_dam)
+        if np.array_equal(new_level, level[start:]):
+            return level
+        level[start:] = new_level
+
+
+def _level_blocks(level):
+    """Returns arrays of the animals of each depth level, from the founders to the deepest level."""
+
+    return np.split(np.argsort(level, kind="stable"), np.flatnonzero(np.diff(np.sort(level))) + 1)
+
+
+def _level_operators(sire, dam, blocks):
+    """Builds the operators passing contributions of each depth level on to their parents.
+
+    Returns a list of tuples, one for each depth level from the founders to the deepest level, of the animals of the
+    level, the distinct parents of those animals and a sparse matrix with a half for each parent (row) of each
+    animal (column).
+    """
+
+    operators = []
+    for block in blocks:
+        s = sire[block]
+        m = dam[block]
+        child = np.concatenate([np.flatnonzero(s >= 0), np.flatnonzero(m >= 0)])
+        parents, row = np.unique(np.concatenate([s[s >= 0], m[m >= 0]]), return_inverse=True)
+        matrix = sp.csr_matrix((np.full(len(child), 0.5), (row, child)), shape=(len(parents), len(block)))
+        operators.append((block, parents, matrix))
+
+    return operators
+
+
+def _propagate(operators, t):
+    """Propagates rows of T backwards over the given depth levels in place.
+
+    Each column of t starts with the unit contribution of an animal and ends up with its row of T. Offspring pass
+    half of their contributions on to their parents, youngest levels first.
+    """
+
+    for block, parents, matrix in reversed(operators):
+        t[parents] += (matrix @ t[block]).astype(t.dtype, copy=False)
+
+
+def _tabular(sire, dam, sparse):
+    """Builds NRM of a pedigree with the tabular method.
+
+    Animals are processed one depth level at a time. Parents of a level are all in earlier levels, so the rows
+    of a whole level are half the sum of its parents' rows, and relationships within the level follow from those
+    rows. Diagonal values are one plus half the relationship between the parents.
+    """
+
+    n = len(sire)
+    blocks = _level_blocks(_levels(sire, dam))
+
+    if not sparse:
+        # an extra row and column of zeros stands for unknown parents at index -1
+        a = np.zeros((n + 1, n + 1))
+        for block in blocks:
+            s = sire[block]
+            d = dam[block]
+            rows = 0.5 * (a[s] + a[d])
+            a[block] = rows
+            a[:, block] = rows.T
+            within = 0.5 * (rows[:, s] + rows[:, d])
+            within[np.diag_indices_from(within)] = 1 + 0.5 * a[s, d]
+            a[np.ix_(block, block)] = within
+        return a[:n, :n]
+
+    a = sp.csr_matrix((n, n))
+    for block in blocks:
+        s = sire[block]
+        d = dam[block]
+
+        # half of each known parent's row contributes to the row of its offspring
+        known_sire = s >= 0
+        known_dam = d >= 0
+        p = sp.csr_matrix(
+            (
+                np.full(known_sire.sum() + known_dam.sum(), 0.5),
+                (
+                    np.concatenate([np.flatnonzero(known_sire), np.flatnonzero(known_dam)]),
+                    np.concatenate([s[known_sire], d[known_dam]]),
+                ),
+            ),
+            shape=(len(block), n),
+        )
+        rows = (p @ a).tocoo()
+        within = (rows.tocsr() @ p.T).tocoo()
+        off_diag = within.row != within.col
+
+        both = known_sire & known_dam
+        diag = np.ones(len(block))
+        if both.any():
+            diag[both] += 0.5 * np.asarray(a[s[both], d[both]]).ravel()
+
+        a = a + sp.csr_matrix(
+            (
+                np.concatenate([rows.data, rows.data, within.data[off_diag], diag]),
+                (
+                    np.concatenate([block[rows.row], rows.col, block[within.row[off_diag]], block]),
+                    np.concatenate([rows.col, block[rows.row], block[within.col[off_diag]], block]),
+                ),
+            ),
+            shape=(n, n),
+        )
+
+    return a
+
+
+def build_nrm(pedigree, ids=None, sparse=False):
+    """Builds the numerator relationship matrix (NRM).
+
+    Computes the whole NRM, or the block of NRM between the given animals, with the tabular method. Only the given
+    animals and their ancestors are visited. Values are exact, unlike the rounded values returned by get_nrm.
+
+    Args:
+        pedigree: An instance of Pedigree class holding the recorded ancestry data.
+        ids: A list of integers indicating the animals to build NRM for, in the order of the rows and columns of
+            the result. Defaults to None for all animals.
+        sparse: A boolean indicating whether to build NRM as a scipy sparse matrix. Defaults to False.
+
+    Returns:
+        A dense array, or a scipy sparse matrix in CSR format if sparse is set, that corresponds to NRM.
+    """
+
+    if not isinstance(pedigree, Pedigree):
+        raise TypeError("'pedigree' must be of type Pedigree")
+    if not isinstance(sparse, bool):
+        raise TypeError("'sparse' must be of type bool")
+
+    sire = pedigree.sire
+    dam = pedigree.dam
+    n = len(pedigree)
+
+    if ids is None:
+        return _tabular(sire, dam, sparse)
+
+    # renumber the animals and their ancestors so that the sub-pedigree is dense
+    keep = pedigree.ancestors(ids)
+    ids = np.asarray(ids, dtype=np.int64)
+    index = np.full(n + 1, -1, dtype=np.int64)
+    index[keep] = np.arange(len(keep))
+    a = _tabular(index[sire[keep]], index[dam[keep]], sparse)
+    pos = index[ids]
+
+    if sparse:
+        return a[pos][:, pos]
+
+    return a[np.ix_(pos, pos)]
+
+
+def nrm_block(pedigree, rows, cols, workers=None, dtype=np.float64, tile=256, backend="auto"):
+    """Builds a block of the numerator relationship matrix (NRM).
+
+    Uses the decomposition A = TDT', where row i of T holds the contributions of the ancestors of i to its genes
+    and D the Mendelian sampling variances. The rows of T of the given animals are found by propagating each animal
+    backwards to its parents over the ancestors of the block, and the block is (X * D) @ Y.T for the rows X and Y of
+    T. Rows of T are computed and multiplied in tiles on a pool of threads, which run in parallel as NumPy releases
+    the GIL in matrix products. Values are exact, unlike the rounded values returned by get_nrm.
+
+    Rows of T are propagated level by level with NumPy, or animal by animal by a kernel compiled with numba, which
+    also releases the GIL, when the numba backend is selected. Both give identical results. A single row of NRM is
+    the block of one animal against the columns.
+
+    Args:
+        pedigree: An instance of Pedigree class holding the recorded ancestry data.
+        rows: A list of integers indicating the animals of the rows.
+        cols: A list of integers indicating the animals of the columns.
+        workers: An integer count of threads. Defaults to None for the default of ThreadPoolExecutor.
+        dtype: A numpy float dtype of the result, either float32 or float64. Defaults to float64.
+        tile: An integer count of animals per tile. Defaults to 256.
+        backend: A string indicating the backend, either "auto", "numpy" or "numba". Defaults to "auto" for numba
+            when it is installed and numpy otherwise.
+
+    Returns:
+        A dense array of the given dtype that corresponds to the block of NRM between rows and cols.
+    """
+
+    if not isinstance(pedigree, Pedigree):
+        raise TypeError("'pedigree' must be of type Pedigree")
+    if workers is not None and not isinstance(workers, int):
+        raise TypeError("'workers' must be of type int")
+    if not isinstance(tile, int):
+        raise TypeError("'tile' must be of type int")
+
+    dtype = np.dtype(dtype)
+    if dtype not in (np.float32, np.float64):
+        raise ValueError("'dtype' must be either float32 or float64")
+    if workers is not None and workers < 1:
+        raise ValueError("'workers' must be positive")
+    if tile < 1:
+        raise ValueError("'tile' must be positive")
+    backend = resolve_backend(backend)
+
+    rows = pedigree._check_ids(rows)
+    cols = pedigree._check_ids(cols)
+    ids, inverse = np.unique(np.concatenate([rows, cols]), return_inverse=True)
+
+    # renumber the animals and their ancestors so that the sub-pedigree is dense
+    keep = pedigree.ancestors(ids)
+    index = np.full(len(pedigree) + 1, -1, dtype=np.int64)
+    index[keep] = np.arange(len(keep))
+    sire = index[pedigree.sire[keep]]
+    dam = index[pedigree.dam[keep]]
+    d = pedigree.nrm.variances()[keep].astype(dtype)
+
+    if backend == "numpy":
+        operators = _level_operators(sire, dam, _level_blocks(_levels(sire, dam)))
+
+    def propagate(chunk):
+        # offspring pass half of their contributions on to their parents, youngest levels first
+        t = np.zeros((len(keep), len(chunk)), dtype=dtype)
+        t[index[chunk], np.arange(len(chunk))] = 1
+        if backend == "numba":
+            jit(propagate_kernel)(sire, dam, t)
+        else:
+            _propagate(operators, t)
+        return t.T
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        t = np.concatenate(
+            list(executor.map(propagate, [ids[i : i + tile] for i in range(0, len(ids), tile)])) or [np.zeros((0, 0))]
+        )
+        x = t[inverse[: len(rows)]] * d
+        y = t[inverse[len(rows) :]]
+
+        block = np.empty((len(rows), len(cols)), dtype=dtype)
+
+        def multiply(start):
+            i, j = start
+            block[i : i + tile, j : j + tile] = x[i : i + tile] @ y[j : j + tile].T
+
+        list(executor.map(multiply, [(i, j) for i in range(0, len(rows), tile) for j in range(0, len(cols), tile)]))
+
+    return block
+
+
+def build_nrm_inverse(pedigree):
+    """Builds the inverse of the numerator relationship matrix (NRM).
+
+    Applies Henderson's rules, accounting for inbreeding of the parents, to set up the inverse directly without
+    building NRM itself. Each animal only adds to the entries between itself and its parents, so the inverse is
+    sparse and takes memory linear in the size of the pedigree.
+
+    Args:
+        pedigree: An instance of Pedigree class holding the recorded ancestry data.
+
+    Returns:
+        A scipy sparse matrix in CSR format that corresponds to the inverse of NRM.
+    """
+
+    if not isinstance(pedigree, Pedigree):
+        raise TypeError("'pedigree' must be of type Pedigree")
+
+    sire = pedigree.sire
+    dam = pedigree.dam
+    n = len(pedigree)
+
+    b = 1 / pedigree.nrm.variances()
+
+    animal = np.arange(n)
+    known_sire = sire >= 0
+    known_dam = dam >= 0
+    both = known_sire & known_dam
+
+    rows = [animal]
+    cols = [animal]
+    vals = [b]
+    for known, parent in ((known_sire, sire), (known_dam, dam)):
+        rows += [animal[known], parent[known], parent[known]]
+        cols += [parent[known], animal[known], parent[known]]
+        vals += [-0.5 * b[known], -0.5 * b[known], 0.25 * b[known]]
+    rows += [sire[both], dam[both]]
+    cols += [dam[both], sire[both]]
+    vals += [0.25 * b[both], 0.25 * b[both]]
+
+    return sp.csr_matrix((np.concatenate(vals), (np.concatenate(rows), np.concatenate(cols))), shape=(n, n))
+
+
+def compute_inbreeding(pedigree):
+    """Calculates the inbreeding coefficients of all animals in the pedigree.
+
+    Computes the coefficients with NrmEngine.inbreeding, one depth level at a time with NumPy, at a cost of O(n * p)
+    for n animals and p distinct pairs of parents, or with the algorithm of Meuwissen and Luo (1992) when numba is
+    installed. Results are kept by the NrmEngine attached to the pedigree.
+
+    Args:
+        pedigree: An instance of Pedigree class holding the recorded ancestry data.
+
+    Returns:
+        An array of floats where each value corresponds to the inbreeding coefficient of the animal with that id.
+    """
+
+    if not isinstance(pedigree, Pedigree):
+        raise TypeError("'pedigree' must be of type Pedigree")
+
+    return pedigree.nrm.inbreeding().copy()
+
+
+def get_nrm(pedigree, i, j, max_depth=None):
     """Calculates the numerator relationship matrix (NRM) value.
 
-    Recursively computes the (i, j) value of NRM using information available from the pedigree provided.
+    Recursively computes the (i, j) value of NRM using information available from the pedigree provided. Values are
+    memoized by the NrmEngine attached to the pedigree, so repeated queries are answered from its cache.
 
     Args:
         pedigree: An instance of Pedigree class holding the recorded ancestry data.
         i: An integer indicating the row.
         j: An integer indicating the column.
+        max_depth: An integer count of generations of ancestors to trace up from i and j. Ancestors beyond are
+            treated as unrelated founders, so the cost of a query is bounded regardless of the depth of the
+            pedigree. Defaults to None for all ancestors.
 
     Returns:
         A float that corresponds to the (i, j) value of NRM.
@@ -19,9 +697,9 @@ def get_nrm(pedigree, i, j):
 
     if not isinstance(pedigree, Pedigree):
         raise TypeError("'pedigree' must be of type Pedigree")
-    if i is not pd.NA and not isinstance(i, int) and not isinstance(i, np.int64):
+    if i is not pd.NA and not isinstance(i, (int, np.integer)):
         raise TypeError("'i' must be of type int")
-    if j is not pd.NA and not isinstance(j, int) and not isinstance(i, np.int64):
+    if j is not pd.NA and not isinstance(j, (int, np.integer)):
         raise TypeError("'j' must be of type int")
 
     if i is not pd.NA and i < 0:
@@ -29,43 +707,27 @@ def get_nrm(pedigree, i, j):
     if j is not pd.NA and j < 0:
         raise ValueError("'j' cannot be negative")
 
-    # swap i and j if i is larger than j
-    if i is not pd.NA and j is not pd.NA and i > j:
-        tmp = i
-        i = j
-        j = tmp
-
-    # get sire and dam of j from the pedigree
-    sire = pedigree.data.iloc[j].sire
-    dam = pedigree.data.iloc[j].dam
+    # unknown animals are unrelated to anyone
+    if i is pd.NA or j is pd.NA:
+        return 0.0
 
-    # diagonal - i and j is the same
-    if i is not pd.NA and i == j:
-        if sire is not pd.NA and dam is not pd.NA:
-            res = 1 + 0.5 * get_nrm(pedigree, sire, dam)
-        else:
-            res = 1
-
-    # off-diagonal - i and j is not the same
-    else:
-        if sire is not pd.NA and dam is not pd.NA:
-            res = 0.5 * (get_nrm(pedigree, sire, i) + get_nrm(pedigree, dam, i))
-        elif sire is not pd.NA:
-            res = 0.5 * get_nrm(pedigree, sire, i)
-        elif dam is not pd.NA:
-            res = 0.5 * get_nrm(pedigree, dam, i)
-        else:
-            res = 0
+    if max_depth is not None:
+        # trace up the sub-pedigree within the given depth, which is not cached on the pedigree
+        keep = pedigree.ancestors([i, j], max_depth)
+        i, j = np.searchsorted(keep, [i, j]).tolist()
+        pedigree = pedigree.prune(keep, 0)
 
-    return round(float(res), 3)
+    return pedigree.nrm.get(int(i), int(j))
 
 
 def get_avg_inbreeding(pedigree, gen):
     """Returns the average inbreeding rate of a generation.
 
-    Average inbreeding rate is calculated across the generation.
+    Average inbreeding rate is calculated across the generation from the inbreeding coefficients of the whole
+    pedigree.
 
     Args:
+        pedigree: An instance of Pedigree class holding the recorded ancestry data.
         gen: An integer indicating the generation number.
 
     Returns:
@@ -77,13 +739,32 @@ def get_avg_inbreeding(pedigree, gen):
     if not isinstance(gen, int):
         raise TypeError("'gen' must be of type int")
 
-    ids = pedigree.data.index[pedigree.data["gen"] == gen].tolist()
-    if len(ids) == 0:
+    mask = pedigree.gen == gen
+    if not mask.any():
         raise ValueError("'gen' must be present in the 'pedigree'")
 
-    sum_inbreeding = 0
-    for i in ids:
-        sum_inbreeding += get_nrm(pedigree, i, i) - 1
-    avg_inbreeding = sum_inbreeding / len(ids)
+    avg_inbreeding = pedigree.nrm.inbreeding()[mask].mean()
+
+    return round(float(avg_inbreeding), 3)
+
+
+def get_avg_inbreeding_by_gen(pedigree):
+    """Returns the average inbreeding rates of all generations.
+
+    Average inbreeding rates are calculated with a single group by over the inbreeding coefficients of the whole
+    pedigree.
+
+    Args:
+        pedigree: An instance of Pedigree class holding the recorded ancestry data.
+
+    Returns:
+        A series of floats indexed by generation number that corresponds to the average inbreeding rate of each
+        generation.
+    """
+
+    if not isinstance(pedigree, Pedigree):
+        raise TypeError("'pedigree' must be of type Pedigree")
+
+    f = pd.Series(pedigree.nrm.inbreeding(), name="inbreeding")
 
-    return round(avg_inbreeding, 3)
+    return f.groupby(pedigree.gen).mean().round(3)
@@ -0,0 +1,22 @@
+import importlib
+
+
+def optional_import(name, extra):
+    """Imports a module that needs an optional dependency.
+
+    Optional dependencies are only imported on first use, so that pynrm can be imported without them.
+
+    Args:
+        name: A name of the module to import.
+        extra: A name of the extra of pynrm installing the dependency.
+
+    Returns:
+        The imported module.
+    """
+
+    try:
+        return importlib.import_module(name)
+    except ImportError as error:
+        raise ImportError(
+            "{} requires the '{}' extra, installed with pip install pynrm[{}]".format(name, extra, extra)
+        ) from error
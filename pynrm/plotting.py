@@ -0,0 +1,33 @@
+import matplotlib.pyplot as plt
+import numpy as np
+
+
+def plot_inbreeding_by_gen(history):
+    """Plot average inbreeding coefficients by generation.
+
+    Args:
+        history: A dataframe indexed by generation number with an inbreeding_mean column, as returned by
+            Simulator.history.
+    """
+
+    plt.plot(history.index, history["inbreeding_mean"])
+    plt.xticks(np.arange(0, len(history), 1))
+    plt.xlabel("Generation")
+    plt.ylabel("Inbreeding Coefficient")
+    plt.title("Average Inbreeding Coefficient by Generation")
+    plt.show()
+
+
+def plot_ebv_by_gen(history):
+    """Plot average EBV by generation.
+
+    Args:
+        history: A dataframe indexed by generation number with an ebv_mean column, as returned by Simulator.history.
+    """
+
+    plt.plot(history.index, history["ebv_mean"])
+    plt.xticks(np.arange(0, len(history), 1))
+    plt.xlabel("Generation")
+    plt.ylabel("Estimated Breeding Value")
+    plt.title("Average Estimated Breeding Value by Generation")
+    plt.show()
@@ -0,0 +1,89 @@
+import copy
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from .Simulator import Simulator
+
+
+def _run_replicate(pedigree, n_gens, male_k, female_k, h, w, seed):
+    """Runs a single replicate and returns its average EBV and inbreeding coefficient by generation."""
+
+    simulator = Simulator(copy.deepcopy(pedigree), male_k, female_k, h, w, rng=np.random.default_rng(seed))
+    for _ in range(n_gens):
+        simulator.reproduce()
+
+    # only generations bred from the simulator are summarized
+    gen = simulator.pedigree.gen
+    mask = (gen >= 0) & (gen <= n_gens)
+    count = np.bincount(gen[mask], minlength=n_gens + 1)
+    avg_ebv = np.bincount(gen[mask], weights=simulator.pedigree.ebv[mask], minlength=n_gens + 1) / count
+    avg_inbreeding = np.bincount(gen[mask], weights=simulator.pedigree.inbreeding()[mask], minlength=n_gens + 1) / count
+
+    return avg_ebv, avg_inbreeding
+
+
+def run_replicates(pedigree, n_reps, n_gens, male_k, female_k, h, w, seed=None, workers=None):
+    """Runs replicates of a breeding simulation.
+
+    Each replicate starts from a copy of the given pedigree and reproduces the given number of generations with a
+    Simulator instance. Replicates are spread over a pool of worker processes, each with its own random Generator
+    spawned from a seed sequence, so results only depend on the seed and not on the number of workers. Workers
+    send back only the per-generation averages of each replicate.
+
+    Args:
+        pedigree: An instance of Pedigree class holding the initial pedigree of every replicate.
+        n_reps: An integer count of replicates to run.
+        n_gens: An integer count of generations to reproduce in each replicate.
+        male_k: An integer count of males to select on each reproduction.
+        female_k: An integer count of females to select on each reproduction.
+        h: A float indicating heritability value.
+        w: A float indicating penalization weight for inbreeding while reproduction.
+        seed: An integer seed of the replicates. Defaults to None for fresh entropy.
+        workers: An integer count of worker processes. Defaults to None for the number of processors. Replicates are
+            run in the current process when set to 1.
+
+    Returns:
+        A dataframe indexed by generation number with the mean and standard deviation across replicates of the
+        average EBV and average inbreeding coefficient of each generation.
+    """
+
+    # validates the simulation parameters before anything is sent to the workers
+    Simulator(pedigree, male_k, female_k, h, w)
+
+    if not isinstance(n_reps, int):
+        raise TypeError("'n_reps' must be of type int")
+    if not isinstance(n_gens, int):
+        raise TypeError("'n_gens' must be of type int")
+    if seed is not None and not isinstance(seed, int):
+        raise TypeError("'seed' must be of type int")
+    if workers is not None and not isinstance(workers, int):
+        raise TypeError("'workers' must be of type int")
+
+    if n_reps < 1:
+        raise ValueError("'n_reps' must be positive")
+    if n_gens < 0:
+        raise ValueError("'n_gens' cannot be negative")
+    if workers is not None and workers < 1:
+        raise ValueError("'workers' must be positive")
+
+    seeds = np.random.SeedSequence(seed).spawn(n_reps)
+    args = ([pedigree] * n_reps, [n_gens] * n_reps, [male_k] * n_reps, [female_k] * n_reps, [h] * n_reps, [w] * n_reps)
+
+    if workers == 1:
+        results = list(map(_run_replicate, *args, seeds))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_run_replicate, *args, seeds))
+
+    avg_ebv = np.array([result[0] for result in results])
+    avg_inbreeding = np.array([result[1] for result in results])
+
+    return pd.DataFrame(
+        {
+            "ebv_mean": avg_ebv.mean(axis=0),
+            "ebv_std": avg_ebv.std(axis=0),
+            "inbreeding_mean": avg_inbreeding.mean(axis=0),
+            "inbreeding_std": avg_inbreeding.std(axis=0),
+        },
+        index=pd.RangeIndex(n_gens + 1, name="gen"),
+    )
@@ -0,0 +1,135 @@
+import numpy as np
+from .nrm import nrm_block
+
+
+class SelectionStrategy:
+    """Selects animals to reproduce from the candidates of a generation.
+
+    Subclasses implement select, which is called by Simulator.reproduce once for the males and once for the females
+    of the latest generation.
+    """
+
+    def select(self, simulator, candidates, k):
+        """Selects k animals from the candidates.
+
+        Args:
+            simulator: An instance of Simulator class running the simulation.
+            candidates: A list of integers indicating the candidate ids.
+            k: An integer count of animals to select.
+
+        Returns:
+            A list of integers indicating the selected animals.
+        """
+
+        raise NotImplementedError
+
+
+class GreedySelection(SelectionStrategy):
+    """Selects animals one at a time by adjusted EBV.
+
+    Picks the candidate with the highest EBV penalized for its average relationship with the animals selected so
+    far, as done by Simulator.get_top_k.
+    """
+
+    def select(self, simulator, candidates, k):
+        return simulator.get_top_k([], list(candidates), k)
+
+
+class OptimalContributionSelection(SelectionStrategy):
+    """Selects animals by optimal contributions.
+
+    Solves for the contributions c of the candidates to the next generation that maximize the genetic gain c'g
+    subject to the contributions summing to one and the mean coancestry c'Ac / 2 of the offspring not exceeding a
+    constraint, where g is EBV and A the NRM of the candidates built with nrm_block. The solution of the Lagrangian
+    is closed-form, and candidates with negative contributions are dropped until all are non-negative. The k
+    candidates with the largest contributions are selected.
+
+    The constraint is set relative to the mean coancestry of the candidates, allowing it to increase by the given rate
+    of inbreeding per generation. When the constraint cannot be met, contributions minimizing coancestry are used.
+
+    Attributes:
+        rate: A float indicating the rate of inbreeding allowed per generation.
+        workers: An integer count of threads building NRM of the candidates, or None for the default.
+    """
+
+    def __init__(self, rate=0.01, workers=None):
+        """Initializes the instance with the rate of inbreeding.
+
+        Args:
+            rate: Defines rate value. Defaults to 0.01.
+            workers: Defines workers value. Defaults to None.
+        """
+
+        if not isinstance(rate, float):
+            raise TypeError("'rate' must be of type float")
+        if workers is not None and not isinstance(workers, int):
+            raise TypeError("'workers' must be of type int")
+
+        if rate < 0 or rate >= 1:
+            raise ValueError("'rate' must be between 0 and 1")
+
+        self.rate = rate
+        self.workers = workers
+
+    def contributions(self, ebv, nrm):
+        """Solves for the optimal contributions.
+
+        Args:
+            ebv: An array of floats indicating EBV of the candidates.
+            nrm: A dense array indicating NRM of the candidates.
+
+        Returns:
+            An array of floats that corresponds to the contribution of each candidate, summing to one.
+        """
+
+        ebv = np.asarray(ebv, dtype=np.float64)
+        nrm = np.asarray(nrm, dtype=np.float64)
+        n = len(ebv)
+        if n == 0:
+            return np.zeros(0)
+
+        coancestry = nrm.sum() / (2 * n**2)
+        constraint = coancestry + self.rate * (1 - coancestry)
+
+        c = np.zeros(n)
+        active = np.ones(n, dtype=bool)
+        while True:
+            g = ebv[active]
+            a = nrm[np.ix_(active, active)]
+            solved = np.linalg.solve(a, np.column_stack([np.ones(len(g)), g]))
+            ones, gains = solved[:, 0], solved[:, 1]
+
+            # 1'A^-1 1, 1'A^-1 g and g'A^-1 g determine the Lagrange multipliers
+            sum_ones = ones.sum()
+            sum_gains = gains.sum()
+            spread = g @ gains - sum_gains**2 / sum_ones
+            slack = 2 * constraint - 1 / sum_ones
+            if slack <= 0 or spread <= 0:
+                solution = ones / sum_ones
+            else:
+                lagrange = np.sqrt(spread / slack)
+                solution = (gains - (sum_gains - lagrange) / sum_ones * ones) / lagrange
+
+            if np.all(solution >= 0) or active.sum() == 1:
+                break
+
+            # drop candidates with negative contributions and solve again
+            ids = np.flatnonzero(active)
+            active[ids[solution < 0]] = False
+
+        c[active] = np.clip(solution, 0, None)
+
+        return c / c.sum()
+
+    def select(self, simulator, candidates, k):
+        if k > len(candidates):
+            raise ValueError("Not enough 'candidates' to select k animals")
+
+        ids = np.asarray(candidates, dtype=np.int64)
+        ebv = simulator.pedigree.ebv[ids - simulator.pedigree.spilled]
+        c = self.contributions(ebv, nrm_block(simulator.pedigree, ids, ids, workers=self.workers))
+
+        # largest contributions first, breaking ties by EBV
+        order = np.lexsort((-ebv, -c))
+
+        return ids[order[:k]].tolist()
@@ -0,0 +1,141 @@
+import contextlib
+import time
+import pandas as pd
+
+
+class SimulatorStats:
+    """Collects timings and counters of the phases of a simulation.
+
+    Instrumentation is opt-in. While disabled, phase returns a shared no-op context and count returns at once, so
+    the hot paths only pay for a method call. While enabled, each phase is timed and the NRM queries made during it
+    are counted from the cache statistics of the engine passed in.
+
+    Attributes:
+        enabled: A boolean indicating whether timings and counters are collected.
+        callback: A callable taking the phase name and its elapsed seconds, called as each phase ends, or None.
+        timers: A dictionary of the total elapsed seconds of each phase.
+        calls: A dictionary of the count of times each phase ran.
+        counters: A dictionary of named counts, such as NRM cache hits and misses and rows appended.
+    """
+
+    _null = contextlib.nullcontext()
+
+    def __init__(self, enabled=False, callback=None):
+        """Initializes the instance with empty timings and counters.
+
+        Args:
+            enabled: Defines enabled value. Defaults to False.
+            callback: Defines callback value. Defaults to None.
+        """
+
+        if not isinstance(enabled, bool):
+            raise TypeError("'enabled' must be of type bool")
+        if callback is not None and not callable(callback):
+            raise TypeError("'callback' must be callable")
+
+        self.enabled = enabled
+        self.callback = callback
+        self.timers = {}
+        self.calls = {}
+        self.counters = {}
+
+    def enable(self, callback=None):
+        """Starts collecting timings and counters.
+
+        Args:
+            callback: A callable taking the phase name and its elapsed seconds. Defaults to None.
+        """
+
+        if callback is not None and not callable(callback):
+            raise TypeError("'callback' must be callable")
+
+        self.enabled = True
+        self.callback = callback
+
+    def disable(self):
+        """Stops collecting timings and counters, keeping those collected so far."""
+
+        self.enabled = False
+
+    def reset(self):
+        """Clears all timings and counters."""
+
+        self.timers.clear()
+        self.calls.clear()
+        self.counters.clear()
+
+    def count(self, name, n=1):
+        """Adds to a counter.
+
+        Args:
+            name: A name of the counter.
+            n: An integer to add. Defaults to 1.
+        """
+
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def phase(self, name, nrm=None):
+        """Returns a context timing a phase.
+
+        Args:
+            name: A name of the phase.
+            nrm: An instance of NrmEngine class whose queries during the phase are counted. Defaults to None.
+
+        Returns:
+            A context manager timing the enclosed code, or a no-op context when disabled.
+        """
+
+        if not self.enabled:
+            return self._null
+
+        return self._phase(name, nrm)
+
+    @contextlib.contextmanager
+    def _phase(self, name, nrm):
+        hits, misses = (nrm.hits, nrm.misses) if nrm is not None else (0, 0)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.timers[name] = self.timers.get(name, 0.0) + elapsed
+            self.calls[name] = self.calls.get(name, 0) + 1
+            if nrm is not None:
+                self.count("nrm_hits", nrm.hits - hits)
+                self.count("nrm_misses", nrm.misses - misses)
+                self.count("nrm_calls", nrm.hits - hits + nrm.misses - misses)
+                self.counters["nrm_depth"] = max(self.counters.get("nrm_depth", 0), nrm.depth)
+            if self.callback is not None:
+                self.callback(name, elapsed)
+
+    def to_dict(self):
+        """Returns timings and counters as a flat dictionary.
+
+        Returns:
+            A dictionary with "<phase>_time" and "<phase>_calls" entries for each phase and an entry for each
+            counter.
+        """
+
+        stats = {}
+        for name in self.timers:
+            stats[name + "_time"] = self.timers[name]
+            stats[name + "_calls"] = self.calls[name]
+        stats.update(self.counters)
+
+        return stats
+
+    def to_frame(self):
+        """Returns timings of the phases as a dataframe.
+
+        Returns:
+            A dataframe indexed by phase name with the number of calls, total and mean elapsed seconds of each phase.
+        """
+
+        frame = pd.DataFrame(
+            {"calls": pd.Series(self.calls, dtype="int64"), "time": pd.Series(self.timers, dtype="float64")}
+        )
+        frame.index.name = "phase"
+        frame["mean_time"] = frame["time"] / frame["calls"]
+
+        return frame
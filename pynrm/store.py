@@ -0,0 +1,102 @@
+import glob
+import os
+import numpy as np
+import pyarrow as pa
+
+
+class ColumnStore:
+    """Stores animal records on disk in columnar form.
+
+    Records are written as a sequence of Arrow IPC (Feather V2) files in a directory, one file per appended batch,
+    so adding records never rewrites the ones already stored. Files are uncompressed, which lets columns be
+    memory-mapped straight into NumPy arrays when read.
+
+    Attributes:
+        path: A path of the directory holding the files.
+    """
+
+    def __init__(self, path):
+        """Initializes the instance, creating the directory if it does not exist.
+
+        Args:
+            path: Defines path value.
+        """
+
+        if not isinstance(path, (str, os.PathLike)):
+            raise TypeError("'path' must be of type str")
+
+        self.path = os.fspath(path)
+        os.makedirs(self.path, exist_ok=True)
+
+    def __len__(self):
+        return sum(table.num_rows for table in self._tables())
+
+    def _files(self):
+        return sorted(glob.glob(os.path.join(self.path, "part-*.arrow")))
+
+    def _tables(self):
+        for file in self._files():
+            with pa.memory_map(file) as source:
+                yield pa.ipc.open_file(source).read_all()
+
+    def append(self, columns):
+        """Appends a batch of records as a new file.
+
+        Args:
+            columns: A dictionary of equally long arrays keyed by column name.
+        """
+
+        if not isinstance(columns, dict):
+            raise TypeError("'columns' must be of type dict")
+
+        table = pa.table({name: np.asarray(values) for name, values in columns.items()})
+        file = os.path.join(self.path, "part-{:06d}.arrow".format(len(self._files())))
+        with pa.OSFile(file + ".tmp", "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+
+        # files only appear once fully written, so an interrupted write leaves the store readable
+        os.replace(file + ".tmp", file)
+
+    def read(self, columns=None):
+        """Reads records of all files.
+
+        Args:
+            columns: A list of column names to read. Defaults to None for all columns.
+
+        Returns:
+            A dictionary of arrays keyed by column name. Arrays are read-only views of the memory-mapped files when
+            the store holds a single file, and concatenated copies otherwise.
+        """
+
+        tables = list(self._tables())
+        if len(tables) == 0:
+            return {}
+
+        table = pa.concat_tables(tables) if len(tables) > 1 else tables[0]
+        if columns is not None:
+            table = table.select(columns)
+
+        return {name: table.column(name).to_numpy() for name in table.column_names}
+
+    def batches(self, columns=None):
+        """Reads records one file at a time.
+
+        Args:
+            columns: A list of column names to read. Defaults to None for all columns.
+
+        Yields:
+            Dictionaries of arrays keyed by column name, one for each appended batch in the order they were appended.
+            Arrays are read-only views of the memory-mapped files.
+        """
+
+        for table in self._tables():
+            if columns is not None:
+                table = table.select(columns)
+            yield {name: table.column(name).to_numpy() for name in table.column_names}
+
+    def clear(self):
+        """Removes all files from the store."""
+
+        for file in self._files():
+            os.remove(file)
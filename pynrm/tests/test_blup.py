@@ -0,0 +1,80 @@
+import numpy as np
+import unittest
+import pynrm.Pedigree as Pedigree
+import pynrm.Simulator as Simulator
+from pynrm.blup import BlupEvaluation, solve_animal_model
+from pynrm.nrm import build_nrm
+from pynrm.tests.test_nrm import small_pedigree
+
+
+class TestBlup(unittest.TestCase):
+    def setUp(self):
+        self.pedigree = small_pedigree()
+
+    def tearDown(self):
+        self.pedigree = None
+
+    def test_solve_animal_model(self):
+        phenotypes = np.array([1.0, -0.5, 0.3, 0.8, 1.2])
+        with self.assertRaises(TypeError):
+            solve_animal_model("not pedigree", phenotypes, 0.4)
+        with self.assertRaises(TypeError):
+            solve_animal_model(self.pedigree, phenotypes, "not float")
+        with self.assertRaises(ValueError):
+            solve_animal_model(self.pedigree, phenotypes[:4], 0.4)
+        with self.assertRaises(ValueError):
+            solve_animal_model(self.pedigree, phenotypes, 0.0)
+
+        # mixed model equations solved directly with the dense inverse of NRM
+        n = len(self.pedigree)
+        lhs = np.block(
+            [
+                [np.array([[n]]), np.ones((1, n))],
+                [np.ones((n, 1)), np.eye(n) + np.linalg.inv(build_nrm(self.pedigree)) * 1.5],
+            ]
+        )
+        expected = np.linalg.solve(lhs, np.concatenate([[phenotypes.sum()], phenotypes]))
+
+        solution, iterations = solve_animal_model(self.pedigree, phenotypes, 0.4)
+        np.testing.assert_allclose(solution, expected, atol=1e-6)
+        self.assertGreater(iterations, 0, "expected iterations from zeros")
+        _, iterations = solve_animal_model(self.pedigree, phenotypes, 0.4, x0=expected)
+        self.assertEqual(iterations, 0, "expected no iterations from the exact solution")
+
+    def test_blup_evaluation(self):
+        with self.assertRaises(TypeError):
+            BlupEvaluation("not float")
+        with self.assertRaises(ValueError):
+            BlupEvaluation(max_iter=0)
+        with self.assertRaises(TypeError):
+            Simulator.Simulator(Pedigree.Pedigree(), 3, 6, 0.6, 0.2, evaluation="not evaluation")
+
+        evaluation = BlupEvaluation()
+        simulator = Simulator.Simulator(Pedigree.Pedigree(rng=7), 3, 6, 0.4, 0.2, rng=8, evaluation=evaluation)
+        initial = simulator.pedigree.ebv.copy()
+        for _ in range(2):
+            simulator.reproduce()
+
+        n = len(simulator.pedigree)
+        self.assertEqual(len(evaluation.tbv), n, "expected a true breeding value for each animal")
+        self.assertEqual(len(evaluation.phenotypes), n, "expected a phenotype for each animal")
+        np.testing.assert_allclose(evaluation.tbv[:1000], initial * np.sqrt(0.4), err_msg="expected scaled true values")
+        self.assertAlmostEqual(
+            np.var(evaluation.tbv[:1000]) / np.var(evaluation.phenotypes[:1000]), 0.4, delta=0.1, msg="expected h"
+        )
+        np.testing.assert_allclose(simulator.pedigree.ebv, evaluation.solution[1:])
+        self.assertGreater(np.corrcoef(evaluation.tbv, simulator.pedigree.ebv)[0, 1], 0.5, "expected accurate EBV")
+
+        with self.assertRaises(ValueError):
+            simulator.save("checkpoint")
+
+        # selecting no males breeds an empty generation
+        simulator = Simulator.Simulator(
+            Pedigree.Pedigree(male_size=5, female_size=5, rng=1), 0, 2, 0.5, 0.2, rng=1, evaluation=BlupEvaluation()
+        )
+        simulator.reproduce()
+        self.assertEqual(simulator.history()["size"].tolist(), [10, 0], "expected an empty generation")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+import importlib.util
+import io
+import os
+import pandas as pd
+import tempfile
+import unittest
+from pynrm.cli import load_scenarios, main, run
+
+SCENARIO = """
+[[scenarios]]
+name = "penalized"
+male_size = 20
+female_size = 20
+male_k = 4
+female_k = 8
+h = 0.4
+w = 0.2
+generations = 2
+replicates = 2
+seed = 1
+
+[[scenarios]]
+male_size = 20
+female_size = 20
+male_k = 4
+female_k = 8
+h = 0.4
+generations = 1
+seed = 2
+"""
+
+
+class TestCli(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "scenario.toml")
+        with open(self.path, "w") as file:
+            file.write(SCENARIO)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_load_scenarios(self):
+        scenarios = load_scenarios(self.path)
+        self.assertEqual([scenario["name"] for scenario in scenarios], ["penalized", "scenario-1"], "wrong names")
+        self.assertEqual(scenarios[1]["w"], 0.0, "expected default w")
+        self.assertEqual(scenarios[1]["replicates"], 1, "expected default replicates")
+
+        path = os.path.join(self.directory.name, "bad.toml")
+        with open(path, "w") as file:
+            file.write("male_k = 3\nfemale_k = 6\nh = 0.4\nfounders = 10\n")
+        with self.assertRaises(ValueError):
+            load_scenarios(path)
+        with open(path, "w") as file:
+            file.write("male_k = 3\nfemale_k = 6\n")
+        with self.assertRaises(ValueError):
+            load_scenarios(path)
+
+    @unittest.skipUnless(importlib.util.find_spec("yaml"), "requires PyYAML")
+    def test_load_yaml_scenarios(self):
+        path = os.path.join(self.directory.name, "scenario.yaml")
+        with open(path, "w") as file:
+            file.write("male_k: 3\nfemale_k: 6\nh: 0.4\nw: 0\n")
+        scenarios = load_scenarios(path)
+        self.assertEqual(len(scenarios), 1, "expected a single scenario")
+        self.assertEqual(scenarios[0]["w"], 0.0, "expected w converted to float")
+
+    def test_run(self):
+        output = os.path.join(self.directory.name, "results.csv")
+        progress = io.StringIO()
+        run(load_scenarios(self.path), output, workers=1, progress=progress)
+
+        results = pd.read_csv(output)
+        self.assertEqual(len(results), 2 * 3 + 2, "expected a row per generation of each replicate")
+        self.assertEqual(results["scenario"].unique().tolist(), ["penalized", "scenario-1"], "wrong scenarios")
+        self.assertEqual(len(progress.getvalue().splitlines()), 3, "expected progress for each replicate")
+        self.assertIn("animals/s", progress.getvalue(), "expected throughput in progress")
+
+        # results only depend on the seeds of the scenarios
+        parallel = os.path.join(self.directory.name, "parallel.csv")
+        main([self.path, "-o", parallel, "-w", "2", "-q"])
+        pd.testing.assert_frame_equal(
+            pd.read_csv(parallel).sort_values(["scenario", "replicate", "gen"], ignore_index=True), results
+        )
+
+    @unittest.skipUnless(importlib.util.find_spec("pyarrow"), "requires pyarrow")
+    def test_run_parquet(self):
+        output = os.path.join(self.directory.name, "results.parquet")
+        main([self.path, "-o", output, "-w", "1", "-q"])
+        self.assertEqual(len(pd.read_parquet(output)), 8, "expected a row per generation of each replicate")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+import numpy as np
+import os
+import tempfile
+import unittest
+import pynrm.Pedigree as Pedigree
+import pynrm.Simulator as Simulator
+from pynrm.genomic import GenomicRelationship, build_g, build_h_inverse, read_raw
+from pynrm.nrm import build_nrm
+from pynrm.tests.test_nrm import small_pedigree
+
+
+class TestGenomic(unittest.TestCase):
+    def setUp(self):
+        self.genotypes = np.random.default_rng(0).integers(0, 3, size=(5, 50)).astype(np.float64)
+
+    def tearDown(self):
+        self.genotypes = None
+
+    def test_build_g(self):
+        with self.assertRaises(TypeError):
+            build_g([[0, 1], [2, 1]])
+        with self.assertRaises(TypeError):
+            build_g(self.genotypes, chunksize="not int")
+        with self.assertRaises(ValueError):
+            build_g(self.genotypes, dtype=np.int64)
+        with self.assertRaises(ValueError):
+            build_g(np.zeros((3, 4)))
+
+        p = self.genotypes.mean(axis=0) / 2
+        z = self.genotypes - 2 * p
+        expected = z @ z.T / (2 * np.sum(p * (1 - p)))
+        np.testing.assert_allclose(build_g(self.genotypes, chunksize=7), expected)
+
+        with tempfile.TemporaryDirectory() as path:
+            np.save(os.path.join(path, "genotypes.npy"), self.genotypes)
+            np.testing.assert_allclose(build_g(os.path.join(path, "genotypes.npy"), chunksize=20), expected)
+
+        # missing genotypes are set to the mean of their marker
+        genotypes = self.genotypes.copy()
+        genotypes[0, 0] = np.nan
+        filled = self.genotypes.copy()
+        filled[0, 0] = np.nanmean(genotypes[:, 0])
+        self.assertEqual(build_g(genotypes).shape, (5, 5), "expected g of all animals")
+        np.testing.assert_allclose(build_g(genotypes), build_g(filled), atol=1e-12)
+
+    def test_read_raw(self):
+        with tempfile.TemporaryDirectory() as path:
+            raw = os.path.join(path, "genotypes.raw")
+            with open(raw, "w") as file:
+                file.write("FID IID PAT MAT SEX PHENOTYPE snp1_A snp2_G snp3_T\n")
+                file.write("f a1 0 0 1 -9 0 1 2\n")
+                file.write("f a2 0 0 2 -9 2 NA 1\n")
+                file.write("f a3 0 0 1 -9 1 1 0\n")
+            iids = read_raw(raw, os.path.join(path, "genotypes.npy"), chunksize=2)
+            self.assertEqual(iids, ["a1", "a2", "a3"], "wrong animal ids")
+            genotypes = np.load(os.path.join(path, "genotypes.npy"))
+            np.testing.assert_array_equal(genotypes, [[0, 1, 2], [2, np.nan, 1], [1, 1, 0]])
+
+    def test_build_h_inverse(self):
+        pedigree = small_pedigree()
+        a = build_nrm(pedigree)
+        genotyped = [2, 3, 4]
+        with self.assertRaises(TypeError):
+            build_h_inverse("not pedigree", genotyped, a[2:, 2:])
+        with self.assertRaises(ValueError):
+            build_h_inverse(pedigree, genotyped, a[3:, 3:])
+
+        # genomic relationships equal to the pedigree ones leave the inverse unchanged
+        np.testing.assert_allclose(build_h_inverse(pedigree, genotyped, a[2:, 2:]).toarray(), np.linalg.inv(a))
+
+        g = a[2:, 2:] + 0.1 * np.eye(3)
+        h = np.linalg.inv(build_h_inverse(pedigree, genotyped, g, alpha=0.0).toarray())
+        np.testing.assert_allclose(h[2:, 2:], g, atol=1e-10)
+
+    def test_genomic_relationship(self):
+        with self.assertRaises(ValueError):
+            GenomicRelationship(np.eye(2), [0, 1, 2])
+
+        pedigree = small_pedigree()
+        relationship = GenomicRelationship([[1.1, 0.3], [0.3, 0.9]], [2, 3], fallback=pedigree.nrm)
+        self.assertEqual(relationship.get(3, 2), 0.3, "expected genomic relationship")
+        self.assertEqual(relationship.get(4, 2), 0.75, "expected pedigree relationship for animals without genotypes")
+        np.testing.assert_array_equal(relationship.row(2, [2, 3, 4]), [1.1, 0.3, 0.75])
+
+        simulator = Simulator.Simulator(Pedigree.Pedigree(rng=3), 3, 6, 0.6, 0.2, rng=3, relationship=relationship)
+        self.assertIs(simulator.relationship.fallback, simulator.nrm, "expected fallback to the simulator engine")
+        simulator.reproduce()
+        self.assertEqual(len(simulator.pedigree), 1018, "expected male_k * female_k new animals")
+        with self.assertRaises(TypeError):
+            Simulator.Simulator(Pedigree.Pedigree(), 3, 6, 0.6, 0.2, relationship="not relationship")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,19 @@
+import subprocess
+import sys
+import unittest
+
+
+class TestImport(unittest.TestCase):
+    def test_import_is_light(self):
+        # workers of replicate pools import the simulator, so plotting and solvers must not be loaded with it
+        code = (
+            "import sys\n"
+            "import pynrm, pynrm.Simulator, pynrm.replicates\n"
+            "print(' '.join(name for name in ('matplotlib', 'scipy.optimize') if name in sys.modules))\n"
+        )
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+        self.assertEqual(result.stdout.strip(), "", "expected heavy modules not imported")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+import importlib.util
+import numpy as np
+import unittest
+import pynrm.Pedigree as Pedigree
+import pynrm.Simulator as Simulator
+from pynrm.kernels import inbreeding_kernel, jit, propagate_kernel, resolve_backend
+from pynrm.nrm import NrmEngine, _inbreeding, _levels, _Levels, build_nrm, nrm_block
+
+HAS_NUMBA = importlib.util.find_spec("numba") is not None
+
+
+class TestKernels(unittest.TestCase):
+    def setUp(self):
+        simulator = Simulator.Simulator(Pedigree.Pedigree(male_size=10, female_size=10, rng=0), 3, 6, 0.6, 0.2, rng=0)
+        for _ in range(4):
+            simulator.reproduce()
+        self.pedigree = simulator.pedigree
+
+    def tearDown(self):
+        self.pedigree = None
+
+    def test_resolve_backend(self):
+        with self.assertRaises(TypeError):
+            resolve_backend(None)
+        with self.assertRaises(ValueError):
+            resolve_backend("not backend")
+        with self.assertRaises(ValueError):
+            NrmEngine(self.pedigree, backend="not backend")
+
+        self.assertEqual(resolve_backend("numpy"), "numpy", "expected numpy backend")
+        self.assertEqual(resolve_backend("auto"), "numba" if HAS_NUMBA else "numpy", "wrong backend picked")
+        if not HAS_NUMBA:
+            with self.assertRaises(ImportError):
+                resolve_backend("numba")
+
+    def test_inbreeding_kernel(self):
+        # animals with one unknown parent, matings among the last simulated animals and a mating of founders
+        n = len(self.pedigree)
+        sire = np.concatenate([self.pedigree.sire, [n - 2, -1, n - 4, n - 2, 0]]).astype(np.int64)
+        dam = np.concatenate([self.pedigree.dam, [-1, n - 1, n - 3, n - 1, 10]]).astype(np.int64)
+        n = len(sire)
+
+        # the NumPy path and the kernel run as plain Python compute the same values, at once or a batch at a time,
+        # keeping depth levels between batches
+        for starts in ([0], [0, 20, 40, 41, n - 3]):
+            f, d = np.zeros(n), np.zeros(n)
+            kernel_f, kernel_d = np.zeros(n), np.zeros(n)
+            levels = _Levels()
+            for start, end in zip(starts, starts[1:] + [n]):
+                _inbreeding(sire[:end], dam[:end], f[:end], d[:end], start, levels=levels)
+                inbreeding_kernel(sire[:end], dam[:end], kernel_f[:end], kernel_d[:end], start)
+            np.testing.assert_allclose(f, kernel_f, atol=1e-12)
+            np.testing.assert_allclose(d, kernel_d, atol=1e-12)
+            np.testing.assert_array_equal(levels.level, _levels(sire, dam))
+            np.testing.assert_array_equal(np.diff(levels.level[levels.order]) >= 0, True)
+
+        np.testing.assert_allclose(f[: len(self.pedigree)], self.pedigree.nrm.inbreeding(), atol=1e-12)
+        self.assertGreater(f.max(), 0, "expected inbred animals")
+        self.assertEqual(f[-5], 0, "expected no inbreeding with an unknown parent")
+
+    def test_propagate_kernel(self):
+        n = len(self.pedigree)
+        t = np.eye(n)
+        propagate_kernel(self.pedigree.sire, self.pedigree.dam, t)
+        np.testing.assert_allclose((t.T * self.pedigree.nrm.variances()) @ t, build_nrm(self.pedigree))
+
+    @unittest.skipUnless(HAS_NUMBA, "numba is not installed")
+    def test_numba_backend(self):
+        n = len(self.pedigree)
+        f, d = np.zeros(n), np.zeros(n)
+        jit(inbreeding_kernel)(self.pedigree.sire, self.pedigree.dam, f, d, 0)
+        kernel_f, kernel_d = np.zeros(n), np.zeros(n)
+        inbreeding_kernel(self.pedigree.sire, self.pedigree.dam, kernel_f, kernel_d, 0)
+        np.testing.assert_array_equal(f, kernel_f)
+        np.testing.assert_array_equal(d, kernel_d)
+
+        expected = NrmEngine(self.pedigree, backend="numpy").inbreeding()
+        np.testing.assert_array_equal(NrmEngine(self.pedigree, backend="numba").inbreeding(), expected)
+
+        ids = np.arange(len(self.pedigree))[::-1]
+        np.testing.assert_array_equal(
+            nrm_block(self.pedigree, ids, ids, tile=7, backend="numba"),
+            nrm_block(self.pedigree, ids, ids, tile=7, backend="numpy"),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+import numpy as np
+import unittest
+import pynrm.Pedigree as Pedigree
+import pynrm.Simulator as Simulator
+from pynrm.mating import FactorialMating, MatingStrategy, MinimumCoancestryMating
+
+
+class TestMating(unittest.TestCase):
+    def setUp(self):
+        self.simulator = Simulator.Simulator(Pedigree.Pedigree(rng=6), 3, 6, 0.6, 0.2, rng=6)
+
+    def tearDown(self):
+        self.simulator = None
+
+    def test_factorial_mating(self):
+        with self.assertRaises(NotImplementedError):
+            MatingStrategy().plan(self.simulator, [0], [1])
+
+        sires, dams = FactorialMating().plan(self.simulator, [0, 1], [2, 3, 4])
+        self.assertEqual(sires.tolist(), [0, 0, 0, 1, 1, 1], "expected each sire mated with every dam")
+        self.assertEqual(dams.tolist(), [2, 3, 4, 2, 3, 4], "expected each dam mated with every sire")
+
+    def test_minimum_coancestry_mating(self):
+        with self.assertRaises(TypeError):
+            MinimumCoancestryMating("not int")
+        with self.assertRaises(TypeError):
+            MinimumCoancestryMating(max_per_sire="not int")
+        with self.assertRaises(ValueError):
+            MinimumCoancestryMating(0)
+        with self.assertRaises(ValueError):
+            MinimumCoancestryMating(1, 1).allocate(np.zeros((1, 2)))
+
+        # each sire is related to one dam only, so matings avoid those pairs
+        nrm = np.array([[0.5, 0.0], [0.0, 0.5]])
+        sires, dams = MinimumCoancestryMating(1, 1).allocate(nrm)
+        self.assertEqual(sorted(zip(sires.tolist(), dams.tolist())), [(0, 1), (1, 0)], "expected unrelated matings")
+
+        sires, dams = MinimumCoancestryMating(2, 3).allocate(np.zeros((2, 3)))
+        self.assertEqual(np.bincount(dams).tolist(), [2, 2, 2], "expected offspring_per_dam matings of each dam")
+        self.assertLessEqual(np.bincount(sires).max(), 3, "expected at most max_per_sire matings of each sire")
+
+        # the allocation is as good as assigning every mating slot of the dams to one of the sires
+        from scipy.optimize import linear_sum_assignment
+
+        nrm = np.random.default_rng(0).uniform(0, 1, size=(4, 6))
+        sires, dams = MinimumCoancestryMating(2, 4).allocate(nrm)
+        dam_slots = np.repeat(np.arange(6), 2)
+        sire_slots = np.repeat(np.arange(4), 4)
+        rows, cols = linear_sum_assignment(nrm[np.ix_(sire_slots, dam_slots)].T)
+        self.assertAlmostEqual(nrm[sires, dams].sum(), nrm[sire_slots[cols], dam_slots[rows]].sum(), msg="not optimal")
+
+        simulator = Simulator.Simulator(
+            Pedigree.Pedigree(rng=6), 3, 6, 0.6, 0.2, rng=6, mating=MinimumCoancestryMating(offspring_per_dam=2)
+        )
+        for _ in range(2):
+            simulator.reproduce()
+        self.assertEqual(len(simulator.pedigree), 1024, "expected offspring_per_dam offspring of each dam")
+        with self.assertRaises(TypeError):
+            Simulator.Simulator(Pedigree.Pedigree(), 3, 6, 0.6, 0.2, mating="not strategy")
+
+
+if __name__ == "__main__":
+    unittest.main()
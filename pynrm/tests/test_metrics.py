@@ -0,0 +1,42 @@
+import numpy as np
+import unittest
+from pynrm.metrics import MetricsCollector, mean_coancestry, selection_intensity
+from pynrm.tests.test_nrm import small_pedigree
+
+
+class TestMetrics(unittest.TestCase):
+    def setUp(self):
+        self.metrics = MetricsCollector()
+
+    def tearDown(self):
+        self.metrics = None
+
+    def test_record(self):
+        with self.assertRaises(TypeError):
+            self.metrics.record("not int", [0.0], [0.0])
+        with self.assertRaises(ValueError):
+            self.metrics.record(0, [0.0, 1.0], [0.0])
+
+        self.metrics.record(0, [1.0, 3.0], [0.0, 0.0])
+        self.metrics.record(1, [2.0, 4.0], [0.1, 0.3], coancestry=0.1, intensity=1.5)
+        self.metrics.record(2, [3.0], [0.2])
+        self.assertEqual(len(self.metrics), 3, "expected one row per generation")
+
+        history = self.metrics.to_frame()
+        self.assertEqual(history.index.tolist(), [0, 1, 2], "expected history indexed by generation")
+        self.assertEqual(history["size"].tolist(), [2, 2, 1], "wrong generation sizes")
+        self.assertEqual(history["ebv_var"][0], 1, "wrong ebv variance")
+        self.assertAlmostEqual(history["inbreeding_max"][1], 0.3)
+        self.assertTrue(np.isnan(history["coancestry"][0]), "expected no selection statistics for generation 0")
+        self.assertAlmostEqual(history["ne"][1], 2.5)
+        self.assertTrue(np.isnan(history["ne"][2]), "expected undefined ne without increase in inbreeding")
+
+    def test_selection_statistics(self):
+        pedigree = small_pedigree()
+        self.assertAlmostEqual(mean_coancestry(pedigree.nrm, [2, 3]), 0.375)
+        self.assertEqual(selection_intensity([0.0, 2.0], [2.0]), 1, "wrong selection intensity")
+        self.assertTrue(np.isnan(selection_intensity([1.0, 1.0], [1.0])), "expected undefined intensity")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,41 @@
+import numpy as np
+import pandas as pd
 import unittest
-from pynrm.nrm import get_nrm, get_avg_inbreeding
+from pynrm.nrm import (
+    NrmEngine,
+    build_nrm,
+    build_nrm_inverse,
+    compute_inbreeding,
+    nrm_block,
+    get_nrm,
+    get_avg_inbreeding,
+    get_avg_inbreeding_by_gen,
+)
 import pynrm.Pedigree as Pedigree
+import pynrm.Simulator as Simulator
+
+
+def small_pedigree():
+    # two founders, two full sibs and an offspring of the full sibs
+    data = pd.DataFrame(
+        {
+            "gen": [0, 0, 1, 1, 2],
+            "sire": [None, None, 0, 0, 2],
+            "dam": [None, None, 1, 1, 3],
+            "ebv": [0.0, 0.0, 0.0, 0.0, 0.0],
+            "sex": ["M", "F", "M", "F", "M"],
+        }
+    )
+    return Pedigree.Pedigree(data)
+
+
+SMALL_NRM = [
+    [1, 0, 0.5, 0.5, 0.5],
+    [0, 1, 0.5, 0.5, 0.5],
+    [0.5, 0.5, 1, 0.5, 0.75],
+    [0.5, 0.5, 0.5, 1, 0.75],
+    [0.5, 0.5, 0.75, 0.75, 1.25],
+]
 
 
 class TestNrm(unittest.TestCase):
@@ -24,6 +59,67 @@ class TestNrm(unittest.TestCase):
 
         self.assertEqual(get_nrm(self.pedigree, 0, 0), 1, "wrong nrm value")
 
+        pedigree = small_pedigree()
+        self.assertEqual(get_nrm(pedigree, 0, 1), 0, "expected unrelated founders")
+        self.assertEqual(get_nrm(pedigree, 2, 3), 0.5, "expected full sibs relationship 0.5")
+        self.assertEqual(get_nrm(pedigree, 4, 4), 1.25, "expected inbred diagonal 1.25")
+        self.assertEqual(get_nrm(pedigree, 4, 0), get_nrm(pedigree, 0, 4), "expected symmetric nrm")
+
+    def test_nrm_engine(self):
+        with self.assertRaises(TypeError):
+            NrmEngine("not pedigree")
+        with self.assertRaises(TypeError):
+            NrmEngine(self.pedigree, "not int")
+        with self.assertRaises(ValueError):
+            NrmEngine(self.pedigree, -1)
+
+        pedigree = small_pedigree()
+        engine = pedigree.nrm
+        self.assertIs(pedigree.nrm, engine, "expected engine to persist on the pedigree")
+
+        self.assertEqual(engine.get(4, 4), 1.25, "wrong nrm value")
+        misses = engine.misses
+        self.assertEqual(engine.get(4, 4), 1.25, "wrong cached nrm value")
+        self.assertEqual(engine.misses, misses, "expected cached value to be reused")
+        self.assertGreater(engine.hits, 0, "expected cache hits")
+
+        engine.invalidate(4)
+        self.assertTrue(all(key[1] < 4 for key in engine._cache), "expected values of animal 4 dropped")
+        self.assertEqual(engine.get(4, 4), 1.25, "wrong nrm value after invalidation")
+        engine.invalidate()
+        self.assertEqual(len(engine), 0, "expected empty cache")
+
+        bounded = NrmEngine(pedigree, maxsize=2)
+        self.assertEqual(bounded.get(4, 4), 1.25, "wrong nrm value with bounded cache")
+        self.assertLessEqual(len(bounded), 2, "expected cache bounded by maxsize")
+
+    def test_nrm_engine_window(self):
+        pedigree = small_pedigree()
+        with self.assertRaises(TypeError):
+            NrmEngine(pedigree, start="not int")
+        with self.assertRaises(ValueError):
+            NrmEngine(pedigree, start=-1)
+        with self.assertRaises(ValueError):
+            NrmEngine(pedigree, start=4, base=np.eye(2))
+
+        window = NrmEngine(pedigree, start=2)
+        self.assertEqual(window.get(2, 3), 0, "expected animals at the start of the window unrelated")
+        self.assertEqual(window.get(4, 4), 1, "expected offspring of unrelated parents not inbred")
+        np.testing.assert_allclose(window.inbreeding(), [0, 0, 0, 0, 0])
+
+        base = NrmEngine(pedigree, start=2, base=np.array(SMALL_NRM)[2:4, 2:4])
+        self.assertEqual(base.get(2, 3), 0.5, "expected relationship carried by the base")
+        self.assertEqual(base.get(4, 4), 1.25, "wrong nrm value with base")
+        np.testing.assert_allclose(base.inbreeding(), [0, 0, 0, 0, 0.25])
+        np.testing.assert_allclose(base.variances(), [1, 1, 1, 1, 0.5])
+        np.testing.assert_allclose(NrmEngine(pedigree).variances(), [1, 1, 0.5, 0.5, 0.5])
+        self.assertEqual(base.get(0, 3), 0, "expected animals before the window unrelated")
+        self.assertEqual(base.get(1, 1), 1, "expected animals before the window counted as founders")
+
+        self.assertEqual(get_nrm(pedigree, 4, 4, max_depth=1), 1, "expected parents treated as founders")
+        self.assertEqual(get_nrm(pedigree, 4, 4, max_depth=2), 1.25, "wrong nrm value within depth")
+        self.assertEqual(get_nrm(pedigree, 2, 4, max_depth=0), 0.5, "expected parent related without ancestors")
+
     def test_get_avg_inbreeding(self):
         with self.assertRaises(TypeError):
             get_avg_inbreeding("not dataframe", 2)
@@ -33,6 +129,98 @@ class TestNrm(unittest.TestCase):
             get_avg_inbreeding(self.pedigree, 3)
 
         self.assertEqual(get_avg_inbreeding(self.pedigree, 0), 0, "expected average inbreeding rate 0")
+        self.assertEqual(get_avg_inbreeding(small_pedigree(), 2), 0.25, "expected average inbreeding rate 0.25")
+
+    def test_get_avg_inbreeding_by_gen(self):
+        with self.assertRaises(TypeError):
+            get_avg_inbreeding_by_gen("not pedigree")
+
+        avg_inbreeding = get_avg_inbreeding_by_gen(small_pedigree())
+        self.assertEqual(avg_inbreeding.index.tolist(), [0, 1, 2], "expected one value per generation")
+        self.assertEqual(avg_inbreeding.tolist(), [0, 0, 0.25], "wrong average inbreeding rates")
+
+    def test_compute_inbreeding(self):
+        with self.assertRaises(TypeError):
+            compute_inbreeding("not pedigree")
+
+        pedigree = small_pedigree()
+        self.assertEqual(compute_inbreeding(pedigree).tolist(), [0, 0, 0, 0, 0.25], "wrong inbreeding coefficients")
+
+        # inbreeding coefficients match the diagonal of NRM on a deeper pedigree
+        data = pedigree.data
+        for _ in range(3):
+            n = len(data.index)
+            offspring = pd.DataFrame(
+                {
+                    "gen": data["gen"].iloc[-1] + 1,
+                    "sire": [n - 1, n - 2, n - 1, n - 3],
+                    "dam": [n - 2, n - 3, n - 4, n - 4],
+                    "ebv": 0.0,
+                    "sex": ["M", "F", "M", "F"],
+                }
+            )
+            data = pd.concat([data, offspring], ignore_index=True)
+        pedigree = Pedigree.Pedigree(data)
+        engine = NrmEngine(pedigree, maxsize=None)
+        for i, f in enumerate(compute_inbreeding(pedigree)):
+            self.assertAlmostEqual(f, engine.get(i, i) - 1, 2, "inbreeding coefficient differs from nrm")
+
+    def test_build_nrm(self):
+        with self.assertRaises(TypeError):
+            build_nrm("not pedigree")
+        with self.assertRaises(TypeError):
+            build_nrm(self.pedigree, ["not int"])
+        with self.assertRaises(TypeError):
+            build_nrm(self.pedigree, sparse="not bool")
+        with self.assertRaises(ValueError):
+            build_nrm(self.pedigree, [1000])
+
+        pedigree = small_pedigree()
+        np.testing.assert_allclose(build_nrm(pedigree), SMALL_NRM, err_msg="wrong nrm")
+        np.testing.assert_allclose(build_nrm(pedigree, sparse=True).toarray(), SMALL_NRM, err_msg="wrong sparse nrm")
+        np.testing.assert_allclose(build_nrm(pedigree, [4, 2]), [[1.25, 0.75], [0.75, 1]], err_msg="wrong nrm block")
+        np.testing.assert_allclose(
+            build_nrm(pedigree, [4, 2], sparse=True).toarray(), [[1.25, 0.75], [0.75, 1]], err_msg="wrong nrm block"
+        )
+        np.testing.assert_array_equal(build_nrm(self.pedigree, [0, 1]), np.eye(2), err_msg="expected unrelated")
+
+    def test_nrm_block(self):
+        with self.assertRaises(TypeError):
+            nrm_block("not pedigree", [0], [0])
+        with self.assertRaises(TypeError):
+            nrm_block(self.pedigree, ["not int"], [0])
+        with self.assertRaises(TypeError):
+            nrm_block(self.pedigree, [0], [0], workers="not int")
+        with self.assertRaises(ValueError):
+            nrm_block(self.pedigree, [0], [1000])
+        with self.assertRaises(ValueError):
+            nrm_block(self.pedigree, [0], [0], dtype=np.int64)
+        with self.assertRaises(ValueError):
+            nrm_block(self.pedigree, [0], [0], workers=0)
+
+        pedigree = small_pedigree()
+        np.testing.assert_allclose(
+            nrm_block(pedigree, [4, 2], [0, 3, 4]), np.array(SMALL_NRM)[np.ix_([4, 2], [0, 3, 4])]
+        )
+        self.assertEqual(nrm_block(pedigree, [], [1]).shape, (0, 1), "expected empty block")
+
+        # tiles computed on several threads match the tabular method
+        simulator = Simulator.Simulator(Pedigree.Pedigree(male_size=10, female_size=10, rng=0), 3, 6, 0.6, 0.2, rng=0)
+        for _ in range(3):
+            simulator.reproduce()
+        ids = np.arange(len(simulator.pedigree))[::-1]
+        expected = build_nrm(simulator.pedigree, ids)
+        np.testing.assert_allclose(nrm_block(simulator.pedigree, ids, ids, workers=4, tile=7), expected)
+        block = nrm_block(simulator.pedigree, ids[:10], ids, dtype=np.float32)
+        self.assertEqual(block.dtype, np.float32, "expected float32 block")
+        np.testing.assert_allclose(block, expected[:10], rtol=1e-6)
+
+    def test_build_nrm_inverse(self):
+        with self.assertRaises(TypeError):
+            build_nrm_inverse("not pedigree")
+
+        inverse = build_nrm_inverse(small_pedigree())
+        np.testing.assert_allclose(inverse.toarray() @ SMALL_NRM, np.eye(5), atol=1e-12, err_msg="wrong nrm inverse")
 
 
 if __name__ == "__main__":
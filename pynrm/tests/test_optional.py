@@ -0,0 +1,14 @@
+import numpy as np
+import unittest
+from pynrm.optional import optional_import
+
+
+class TestOptional(unittest.TestCase):
+    def test_optional_import(self):
+        self.assertIs(optional_import("numpy", "numpy"), np, "expected installed module")
+        with self.assertRaisesRegex(ImportError, r"pynrm\[missing\]"):
+            optional_import("pynrm_missing_module", "missing")
+
+
+if __name__ == "__main__":
+    unittest.main()
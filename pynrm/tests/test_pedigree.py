@@ -1,4 +1,8 @@
+import importlib.util
+import numpy as np
+import os
 import pandas as pd
+import tempfile
 import unittest
 import pynrm.Pedigree as Pedigree
 
@@ -13,6 +17,8 @@ class TestSimulator(unittest.TestCase):
     def test_pedigree(self):
         with self.assertRaises(TypeError):
             Pedigree.Pedigree("not dataframe")
+        with self.assertRaises(TypeError):
+            Pedigree.Pedigree(rng="not rng")
 
         self.assertEqual(self.pedigree.data.shape[1], 5, "expected 5 columns")
         self.assertEqual(self.pedigree.data[self.pedigree.data["sex"] == "M"].shape[0], 500, "expected 500 males")
@@ -21,9 +27,205 @@ class TestSimulator(unittest.TestCase):
         self.assertTrue(pd.isna(self.pedigree.data["sire"][0]), "expected sire NA")
         self.assertTrue(pd.isna(self.pedigree.data["dam"][0]), "expected dam NA")
 
+        with self.assertRaises(ValueError):
+            Pedigree.Pedigree(self.pedigree.data.assign(sex="X"))
+        with self.assertRaises(ValueError):
+            Pedigree.Pedigree(self.pedigree.data.assign(sire=1))
+
+    def test_rng(self):
+        np.testing.assert_array_equal(
+            Pedigree.Pedigree(rng=1).ebv, Pedigree.Pedigree(rng=np.random.default_rng(1)).ebv, "expected seeded ebv"
+        )
+        self.assertFalse(np.array_equal(Pedigree.Pedigree(rng=1).ebv, Pedigree.Pedigree(rng=2).ebv), "expected new ebv")
+
+    def test_arrays(self):
+        self.assertEqual(len(self.pedigree), 1000, "expected 1000 animals")
+        self.assertEqual(self.pedigree.sire.dtype, np.int32, "expected int32 sire ids")
+        self.assertEqual(self.pedigree.dam.dtype, np.int32, "expected int32 dam ids")
+        self.assertEqual(self.pedigree.gen.dtype, np.int32, "expected int32 generations")
+        self.assertEqual(self.pedigree.ebv.dtype, np.float64, "expected float64 ebv")
+        self.assertEqual(self.pedigree.sex.dtype, np.int8, "expected int8 sexes")
+        self.assertTrue((self.pedigree.sire == -1).all(), "expected unknown sires")
+        self.assertEqual((self.pedigree.sex == Pedigree.MALE).sum(), 500, "expected 500 males")
+
+        pedigree = Pedigree.Pedigree(self.pedigree.data)
+        np.testing.assert_array_equal(pedigree.ebv, self.pedigree.ebv, err_msg="expected ebv to round-trip")
+        np.testing.assert_array_equal(pedigree.sex, self.pedigree.sex, err_msg="expected sex to round-trip")
+
+    def test_inbreeding(self):
+        inbreeding = self.pedigree.inbreeding()
+        self.assertEqual(len(inbreeding), 1000, "expected one coefficient per animal")
+        self.assertEqual(inbreeding.max(), 0, "expected no inbreeding among founders")
+
+    def test_append(self):
+        engine = self.pedigree.nrm
+        ids = self.pedigree.append(1, [0, 2], [500, 501], [1.0, 2.0], [Pedigree.MALE, Pedigree.FEMALE])
+        self.assertEqual(ids.tolist(), [1000, 1001], "expected ids following existing animals")
+        self.assertEqual(len(self.pedigree), 1002, "expected 1002 animals")
+        self.assertEqual(self.pedigree.data.shape[0], 1002, "expected dataframe rebuilt with new animals")
+        pd.testing.assert_frame_equal(self.pedigree.tail(1000), self.pedigree.data.loc[1000:])
+        with self.assertRaises(TypeError):
+            self.pedigree.tail("not int")
+        with self.assertRaises(ValueError):
+            self.pedigree.tail(1003)
+        self.assertEqual(self.pedigree.data["sex"][1001], "F", "expected female")
+        self.assertEqual(self.pedigree.sire[1000], 0, "wrong sire id")
+        self.assertIs(self.pedigree.nrm, engine, "expected engine kept after append")
+
+        self.pedigree.append(2, [1000] * 2000, [1001] * 2000, np.zeros(2000), np.zeros(2000))
+        self.assertEqual(len(self.pedigree), 3002, "expected 3002 animals")
+        self.assertEqual(self.pedigree.ebv[1001], 2.0, "expected existing records kept after growing")
+
+        with self.assertRaises(ValueError):
+            self.pedigree.append(3, [0], [1], [0.0, 1.0], [0])
+        with self.assertRaises(ValueError):
+            self.pedigree.append(3, [0], [1], [0.0], [2])
+        with self.assertRaises(ValueError):
+            self.pedigree.append(3, [5000], [1], [0.0], [0])
+        with self.assertRaises(ValueError):
+            self.pedigree.append(3, [-2], [1], [0.0], [0])
+        self.assertEqual(len(self.pedigree), 3002, "expected invalid records rejected")
+
+    def test_prune(self):
+        # two founders, two full sibs and an offspring of the full sibs
+        data = pd.DataFrame(
+            {
+                "gen": [0, 0, 1, 1, 2, 0],
+                "sire": [None, None, 0, 0, 2, None],
+                "dam": [None, None, 1, 1, 3, None],
+                "ebv": [0.0, 1.0, 2.0, 3.0, 4.0, 5.0],
+                "sex": ["M", "F", "M", "F", "M", "F"],
+            }
+        )
+        pedigree = Pedigree.Pedigree(data)
+
+        with self.assertRaises(TypeError):
+            pedigree.ancestors(["not int"])
+        with self.assertRaises(TypeError):
+            pedigree.ancestors([4], "not int")
+        with self.assertRaises(ValueError):
+            pedigree.ancestors([6])
+        with self.assertRaises(ValueError):
+            pedigree.ancestors([4], -1)
+
+        self.assertEqual(pedigree.ancestors([4]).tolist(), [0, 1, 2, 3, 4], "expected all ancestors")
+        self.assertEqual(pedigree.ancestors([4], 1).tolist(), [2, 3, 4], "expected parents only")
+        self.assertEqual(pedigree.ancestors([2, 5]).tolist(), [0, 1, 2, 5], "expected ancestors of both")
+
+        pruned = pedigree.prune([4])
+        self.assertEqual(len(pruned), 5, "expected animal 5 pruned")
+        self.assertEqual(pruned.inbreeding()[-1], 0.25, "expected inbreeding kept in sub-pedigree")
+        self.assertEqual(pruned.find([4]).tolist(), [4], "expected ids mapped back")
+
+        truncated = pedigree.prune([4], max_depth=1)
+        self.assertEqual(truncated.original_ids, [2, 3, 4], "expected original ids of kept animals")
+        self.assertEqual(truncated.ebv.tolist(), [2.0, 3.0, 4.0], "expected records of kept animals")
+        self.assertEqual(truncated.sire.tolist(), [-1, -1, 0], "expected parents beyond max_depth unknown")
+        self.assertEqual(truncated.inbreeding()[-1], 0, "expected parents treated as unrelated")
+        with self.assertRaises(ValueError):
+            truncated.find([0])
+        with self.assertRaises(ValueError):
+            pedigree.find([0])
+
+    def test_from_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "pedigree.csv")
+
+            # unsorted records with string ids, '0' for an unknown parent and a parent without a record
+            records = pd.DataFrame(
+                {
+                    "id": ["D1", "S1", "C3", "X9"],
+                    "sire": ["S1", "0", "S1", None],
+                    "dam": ["X9", "0", "D1", None],
+                    "ebv": [1.5, 0.5, None, None],
+                    "sex": ["F", "M", None, None],
+                }
+            )
+            records.to_csv(path, index=False)
+
+            with self.assertRaises(TypeError):
+                Pedigree.Pedigree.from_file(path, chunksize="not int")
+            with self.assertRaises(ValueError):
+                Pedigree.Pedigree.from_file(path, missing="not option")
+            with self.assertRaises(ValueError):
+                Pedigree.Pedigree.from_file(path)
+
+            pedigree = Pedigree.Pedigree.from_file(path, chunksize=2, unknown=["0"])
+            self.assertEqual(len(pedigree), 4, "expected 4 animals")
+            self.assertTrue((pedigree.sire < np.arange(4)).all(), "expected sires before offspring")
+            self.assertTrue((pedigree.dam < np.arange(4)).all(), "expected dams before offspring")
+            self.assertEqual(pedigree.original_ids[-1], "C3", "expected youngest animal last")
+            self.assertEqual(pedigree.gen.tolist(), [0, 0, 1, 2], "expected generations from depth")
+
+            frame = pedigree.to_frame(original_ids=True)
+            self.assertEqual(frame.loc["C3", "sire"], "S1", "expected original sire id")
+            self.assertEqual(frame.loc["C3", "dam"], "D1", "expected original dam id")
+            self.assertEqual(frame.loc["S1", "sex"], "M", "expected sex of record")
+            self.assertEqual(frame.loc["X9", "ebv"], 0, "expected default ebv")
+
+            records.loc[1, ["sire", "dam"]] = ["C3", "0"]
+            records.to_csv(path, index=False)
+            with self.assertRaises(ValueError):
+                Pedigree.Pedigree.from_file(path, unknown=["0"], missing="add")
+
+            records.loc[1, ["sire", "dam"]] = ["0", "0"]
+            pd.concat([records, records.iloc[[0]]]).to_csv(path, index=False)
+            with self.assertRaises(ValueError):
+                Pedigree.Pedigree.from_file(path, unknown=["0"])
+
+    @unittest.skipUnless(importlib.util.find_spec("pyarrow"), "requires pyarrow")
+    def test_from_parquet(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "pedigree.parquet")
+            pd.DataFrame({"id": [3, 1, 2], "sire": [1, None, None], "dam": [2, None, None]}).to_parquet(path)
+
+            pedigree = Pedigree.Pedigree.from_file(path, chunksize=1)
+            self.assertEqual(pedigree.original_ids, [1, 2, 3], "expected parents first")
+            self.assertEqual(pedigree.sex.tolist(), [Pedigree.MALE, Pedigree.FEMALE, Pedigree.FEMALE], "wrong sexes")
+
+    @unittest.skipUnless(importlib.util.find_spec("pyarrow"), "requires pyarrow")
+    def test_spill(self):
+        from pynrm.store import ColumnStore
+
+        pedigree = Pedigree.Pedigree.from_arrays(
+            [0, 0, 1, 1, 2], [-1, -1, 0, 0, 2], [-1, -1, 1, 1, 3], range(5), [0, 1] * 2 + [0]
+        )
+        pedigree.original_ids = ["a", "b", "c", "d", "e"]
+        expected = pedigree.to_frame(original_ids=True)
+        with tempfile.TemporaryDirectory() as directory:
+            store = ColumnStore(directory)
+            with self.assertRaises(TypeError):
+                pedigree.spill(store, "not int")
+            with self.assertRaises(ValueError):
+                pedigree.spill(store, 6)
+
+            pedigree.spill(store, 2)
+            pedigree.spill(store, 4)
+            with self.assertRaises(ValueError):
+                pedigree.spill(store, 3)
+            with self.assertRaises(ValueError):
+                pedigree.spill(ColumnStore(directory), 4)
+
+            self.assertEqual(len(store), 4, "expected 4 spilled records")
+            self.assertEqual(pedigree.ebv.tolist(), [4.0], "expected EBV held in memory only")
+            self.assertEqual(pedigree.data.index.tolist(), [4], "expected data held in memory only")
+            self.assertEqual(len(list(pedigree.iter_frames())), 3, "expected a frame per spilled batch")
+            pd.testing.assert_frame_equal(pedigree.to_frame(original_ids=True), expected)
+            self.assertEqual(pedigree.get_avg_ebv(1), 2.5, "expected average EBV read from the store")
+            self.assertEqual(pedigree.prune([4]).ebv.tolist(), [0.0, 1.0, 2.0, 3.0, 4.0], "expected spilled EBV")
+
+            pedigree.append(3, [4], [3], [5.0], [1])
+            self.assertEqual(pedigree.sex.tolist(), [0, 1], "expected appended sex")
+            self.assertEqual(pedigree.inbreeding()[-1], 0.375, "expected inbreeding from parents held in memory")
+
     def test_get_avg_ebv(self):
         with self.assertRaises(TypeError):
             self.pedigree.get_avg_ebv("not int")
 
-        self.pedigree.data["ebv"] = 1.5
+        self.pedigree.update_ebv(np.full(len(self.pedigree), 1.5))
         self.assertEqual(self.pedigree.get_avg_ebv(0), 1.5, "expected average EBV 1.5")
+
+        # data is a snapshot, so writing to it leaves the pedigree unchanged
+        self.pedigree.data["ebv"] = 0.0
+        self.assertEqual(self.pedigree.get_avg_ebv(0), 1.5, "expected EBV of the pedigree unchanged")
+        self.assertEqual(self.pedigree.data["ebv"].mean(), 1.5, "expected snapshot of the pedigree")
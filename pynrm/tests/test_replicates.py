@@ -0,0 +1,48 @@
+import unittest
+import pandas as pd
+import pynrm.Pedigree as Pedigree
+from pynrm.replicates import run_replicates
+
+
+class TestReplicates(unittest.TestCase):
+    def setUp(self):
+        self.pedigree = Pedigree.Pedigree(male_size=20, female_size=20, rng=8)
+
+    def tearDown(self):
+        self.pedigree = None
+
+    def test_run_replicates(self):
+        with self.assertRaises(TypeError):
+            run_replicates("not pedigree", 2, 2, 2, 4, 0.6, 0.2)
+        with self.assertRaises(TypeError):
+            run_replicates(self.pedigree, "not int", 2, 2, 4, 0.6, 0.2)
+        with self.assertRaises(TypeError):
+            run_replicates(self.pedigree, 2, "not int", 2, 4, 0.6, 0.2)
+        with self.assertRaises(TypeError):
+            run_replicates(self.pedigree, 2, 2, 2, 4, 0.6, 0.2, seed="not int")
+        with self.assertRaises(ValueError):
+            run_replicates(self.pedigree, 0, 2, 2, 4, 0.6, 0.2)
+        with self.assertRaises(ValueError):
+            run_replicates(self.pedigree, 2, -1, 2, 4, 0.6, 0.2)
+        with self.assertRaises(ValueError):
+            run_replicates(self.pedigree, 2, 2, 2, 4, 0.6, 0.2, workers=0)
+
+        summary = run_replicates(self.pedigree, 3, 2, 3, 6, 0.6, 0.2, seed=1, workers=1)
+        self.assertEqual(summary.index.tolist(), [0, 1, 2], "expected one row per generation")
+        self.assertEqual(
+            summary.columns.tolist(),
+            ["ebv_mean", "ebv_std", "inbreeding_mean", "inbreeding_std"],
+            "expected ebv and inbreeding summaries",
+        )
+        self.assertAlmostEqual(summary["ebv_std"][0], 0, msg="expected replicates to share the initial generation")
+        self.assertEqual(len(self.pedigree), 40, "expected initial pedigree left unchanged")
+
+        pd.testing.assert_frame_equal(
+            summary,
+            run_replicates(self.pedigree, 3, 2, 3, 6, 0.6, 0.2, seed=1, workers=2),
+            "expected results independent of worker count",
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
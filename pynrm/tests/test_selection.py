@@ -0,0 +1,55 @@
+import numpy as np
+import unittest
+import pynrm.Pedigree as Pedigree
+import pynrm.Simulator as Simulator
+from pynrm.selection import GreedySelection, OptimalContributionSelection, SelectionStrategy
+
+
+class TestSelection(unittest.TestCase):
+    def setUp(self):
+        self.simulator = Simulator.Simulator(Pedigree.Pedigree(rng=4), 3, 6, 0.6, 0.2, rng=4)
+
+    def tearDown(self):
+        self.simulator = None
+
+    def test_greedy_selection(self):
+        with self.assertRaises(NotImplementedError):
+            SelectionStrategy().select(self.simulator, [0, 1], 1)
+
+        candidates = list(range(10))
+        selected = GreedySelection().select(self.simulator, candidates, 3)
+        self.assertEqual(selected, self.simulator.get_top_k([], list(range(10)), 3), "expected get_top_k selection")
+        self.assertEqual(candidates, list(range(10)), "expected candidates left unchanged")
+
+    def test_optimal_contribution_selection(self):
+        with self.assertRaises(TypeError):
+            OptimalContributionSelection("not float")
+        with self.assertRaises(ValueError):
+            OptimalContributionSelection(1.0)
+
+        # unrelated candidates with a loose constraint get contributions ordered by EBV
+        ocs = OptimalContributionSelection(0.5)
+        c = ocs.contributions([1.0, 2.0, 3.0], np.eye(3))
+        self.assertAlmostEqual(c.sum(), 1)
+        self.assertTrue(np.all(np.diff(c) >= 0), "expected larger contributions for larger EBV")
+
+        # full sibs share contributions when the constraint is tight
+        nrm = np.array([[1, 0.5, 0], [0.5, 1, 0], [0, 0, 1]])
+        c = OptimalContributionSelection(0.0).contributions([2.0, 2.0, 1.0], nrm)
+        self.assertLessEqual(c @ nrm @ c / 2, nrm.sum() / 18 + 1e-9, "expected coancestry constraint met")
+        self.assertGreater(c[2], 0, "expected unrelated candidate to contribute")
+
+        selected = OptimalContributionSelection(0.01).select(self.simulator, list(range(20)), 4)
+        self.assertEqual(len(set(selected)), 4, "expected k distinct animals")
+        with self.assertRaises(ValueError):
+            ocs.select(self.simulator, [0, 1], 3)
+
+        simulator = Simulator.Simulator(Pedigree.Pedigree(rng=4), 3, 6, 0.6, 0.2, rng=4, selection=ocs)
+        simulator.reproduce()
+        self.assertEqual(len(simulator.pedigree), 1018, "expected male_k * female_k new animals")
+        with self.assertRaises(TypeError):
+            Simulator.Simulator(Pedigree.Pedigree(), 3, 6, 0.6, 0.2, selection="not strategy")
+
+
+if __name__ == "__main__":
+    unittest.main()
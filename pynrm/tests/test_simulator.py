@@ -1,7 +1,15 @@
+import glob
+import importlib.util
+import numpy as np
+import os
+import pandas as pd
+import tempfile
 import unittest
 from unittest import mock
 import pynrm.Simulator as Simulator
 import pynrm.Pedigree as Pedigree
+from pynrm.blup import BlupEvaluation
+from pynrm.nrm import get_avg_inbreeding_by_gen
 
 
 class TestSimulator(unittest.TestCase):
@@ -30,6 +38,75 @@ class TestSimulator(unittest.TestCase):
             Simulator.Simulator(self.simulator.pedigree, 2, 4, -0.6, 0.2)
         with self.assertRaises(ValueError):
             Simulator.Simulator(self.simulator.pedigree, 2, 4, 0.6, -0.2)
+        with self.assertRaises(TypeError):
+            Simulator.Simulator(self.simulator.pedigree, 2, 4, 0.6, 0.2, rng="not rng")
+        with self.assertRaises(TypeError):
+            Simulator.Simulator(self.simulator.pedigree, 2, 4, 0.6, 0.2, nrm_window="not int")
+        with self.assertRaises(ValueError):
+            Simulator.Simulator(self.simulator.pedigree, 2, 4, 0.6, 0.2, nrm_window=-1)
+
+    def test_rng(self):
+        def run(seed):
+            simulator = Simulator.Simulator(Pedigree.Pedigree(rng=seed), 3, 6, 0.6, 0.2, rng=seed)
+            for _ in range(2):
+                simulator.reproduce()
+            return simulator.pedigree.data
+
+        pd.testing.assert_frame_equal(run(7), run(7), "expected seeded runs to be identical")
+        self.assertFalse(run(7).equals(run(8)), "expected runs with different seeds to differ")
+
+    def test_nrm_window(self):
+        def run(**kwargs):
+            simulator = Simulator.Simulator(Pedigree.Pedigree(rng=5), 3, 6, 0.6, 0.2, rng=5, **kwargs)
+            for _ in range(3):
+                simulator.reproduce()
+            return simulator
+
+        full = run()
+        pd.testing.assert_frame_equal(
+            run(nrm_window=3).pedigree.data, full.pedigree.data, "expected window covering all generations unchanged"
+        )
+
+        windowed = run(nrm_window=1)
+        self.assertEqual(windowed.nrm.start, int(np.argmax(windowed.pedigree.gen == 2)), "wrong start of window")
+        with mock.patch("numpy.searchsorted", side_effect=AssertionError("window located again")):
+            self.assertIs(windowed.nrm, windowed.nrm, "expected window kept within a generation")
+        ids = np.flatnonzero(windowed.pedigree.gen == 2)[:2].tolist()
+        self.assertEqual(windowed.nrm.get(*ids), 0, "expected base generation unrelated")
+
+        # carrying the base forward one generation at a time keeps relationships within the window exact
+        carried = run(nrm_window=1, carry_base=True)
+        last = np.flatnonzero(carried.pedigree.gen == 3)[:10].tolist()
+        self.assertEqual(
+            carried.nrm.row(last[0], last).tolist(),
+            carried.pedigree.nrm.row(last[0], last).tolist(),
+            "wrong carried nrm",
+        )
+
+        # a window of the latest generation only is built once per generation, from selection to breeding
+        simulator = Simulator.Simulator(Pedigree.Pedigree(rng=5), 3, 6, 0.6, 0.2, rng=5, nrm_window=0, carry_base=True)
+        with mock.patch.object(Simulator, "NrmEngine", wraps=Simulator.NrmEngine) as engine:
+            for _ in range(3):
+                simulator.reproduce()
+        starts = [call.kwargs["start"] for call in engine.call_args_list if "start" in call.kwargs]
+        firsts = [int(np.argmax(simulator.pedigree.gen == gen)) for gen in range(4)]
+        self.assertEqual(starts, sorted(set(starts)), "expected each window built once")
+        self.assertTrue(set(starts) <= set(firsts), "expected windows starting at a generation")
+        self.assertEqual(simulator.nrm.start, firsts[3], "wrong start of window")
+
+        # statistics are recorded from the whole pedigree, as if the same pedigree had been bred without a window
+        history = windowed.history()
+        pedigree = windowed.pedigree
+        unwindowed = Simulator.Simulator(
+            Pedigree.Pedigree.from_arrays(pedigree.gen, pedigree.sire, pedigree.dam, pedigree.ebv, pedigree.sex),
+            3,
+            6,
+            0.6,
+            0.2,
+        )
+        unwindowed.gen = windowed.gen
+        pd.testing.assert_series_equal(history["inbreeding_mean"], unwindowed.history()["inbreeding_mean"])
+        self.assertGreater(history["inbreeding_mean"][3], 0, "expected inbreeding beyond the window")
 
     def test_get_ebv(self):
         with self.assertRaises(ValueError):
@@ -37,6 +114,23 @@ class TestSimulator(unittest.TestCase):
         with self.assertRaises(ValueError):
             self.simulator.get_ebv(0, -1)
 
+    def test_get_ebvs(self):
+        with self.assertRaises(ValueError):
+            self.simulator.get_ebvs([0, 1], [2])
+        with self.assertRaises(ValueError):
+            self.simulator.get_ebvs([-1], [2])
+        with self.assertRaises(ValueError):
+            self.simulator.get_ebvs([0], [-2])
+
+        ebv = self.simulator.pedigree.ebv
+        self.assertEqual(len(self.simulator.get_ebvs([0, 1, 2], [500, 501, 502])), 3, "expected 3 values")
+        self.simulator.rng = mock.Mock(normal=mock.Mock(return_value=np.zeros(2)))
+        np.testing.assert_allclose(
+            self.simulator.get_ebvs([0, 1], [500, 501]),
+            np.round(0.5 * (ebv[[0, 1]] + ebv[[500, 501]]), 3),
+            err_msg="expected parent average without deviation",
+        )
+
     def test_get_adjusted_ebv(self):
         ebv = round(self.simulator.pedigree.data.iloc[0].ebv, 3)
         self.assertEqual(self.simulator.get_adjusted_ebv(0, []), ebv, "incorrect adjusted ebv value")
@@ -57,27 +151,144 @@ class TestSimulator(unittest.TestCase):
             "not a list with the best ebv when k = 1",
         )
 
+    def test_get_top_k_matches_greedy(self):
+        def greedy(simulator, candidates, k):
+            top_k = []
+            candidates = list(candidates)
+            while len(top_k) < k:
+                adjusted_ebvs = [simulator.get_adjusted_ebv(candidate, top_k) for candidate in candidates]
+                top_k.append(candidates.pop(adjusted_ebvs.index(max(adjusted_ebvs))))
+            return top_k
+
+        simulator = Simulator.Simulator(Pedigree.Pedigree(male_size=20, female_size=20, rng=0), 4, 6, 0.6, 0.5, rng=0)
+        for _ in range(3):
+            simulator.reproduce()
+        candidates = np.flatnonzero(simulator.pedigree.gen == simulator.gen).tolist()
+
+        self.assertEqual(
+            simulator.get_top_k([], list(candidates), 20),
+            greedy(simulator, candidates, 20),
+            "expected same selections as greedy adjusted ebv",
+        )
+
+        remaining = list(candidates)
+        top_k = simulator.get_top_k([], remaining, 10)
+        self.assertEqual(len(remaining), len(candidates) - 10, "expected selected animals removed from candidates")
+        self.assertTrue(set(top_k).isdisjoint(remaining), "expected selected animals removed from candidates")
+
+        with self.assertRaises(ValueError):
+            simulator.get_top_k([], [0, 1], 3)
+
     def test_reproduce(self):
-        self.simulator.reproduce()
+        data = self.simulator.reproduce()
         self.assertEqual(self.simulator.gen, 1, "generation not incremented")
+        self.assertEqual(data.index.tolist(), list(range(1000, 1008)), "expected male_k * female_k new animals")
+        self.assertTrue((data["gen"] == 1).all(), "expected new animals in generation 1")
+        pd.testing.assert_frame_equal(data, self.simulator.pedigree.data.loc[1000:], "expected records of new animals")
+
+    def test_history(self):
+        simulator = Simulator.Simulator(Pedigree.Pedigree(rng=2), 3, 6, 0.6, 0.2, rng=2)
+        for _ in range(3):
+            simulator.reproduce()
+
+        history = simulator.history()
+        self.assertEqual(history.index.tolist(), [0, 1, 2, 3], "expected one row per generation")
+        self.assertEqual(history["size"].tolist(), [1000, 18, 18, 18], "wrong generation sizes")
+        np.testing.assert_allclose(
+            history["inbreeding_mean"].round(3), get_avg_inbreeding_by_gen(simulator.pedigree).values, atol=1e-3
+        )
+        self.assertTrue(history["intensity"][1:].gt(0).all(), "expected positive selection intensity")
+        self.assertEqual(len(simulator.metrics), 4, "expected history not to be recorded twice")
+
+        # selecting no males breeds an empty generation
+        simulator = Simulator.Simulator(Pedigree.Pedigree(male_size=5, female_size=5, rng=1), 0, 2, 0.5, 0.2, rng=1)
+        simulator.reproduce()
+        self.assertEqual(simulator.history()["size"].tolist(), [10, 0], "expected an empty generation")
 
-    @mock.patch("%s.Simulator.plt" % __name__)
+    @unittest.skipUnless(importlib.util.find_spec("matplotlib"), "requires matplotlib")
+    @mock.patch("pynrm.plotting.plt")
     def test_plot_inbreeding_by_gen(self, mock_plt):
         self.simulator.reproduce()
         self.simulator.plot_inbreeding_by_gen()
         mock_plt.title.assert_called_once_with("Average Inbreeding Coefficient by Generation")
 
-    @mock.patch("%s.Simulator.plt" % __name__)
+    @unittest.skipUnless(importlib.util.find_spec("matplotlib"), "requires matplotlib")
+    @mock.patch("pynrm.plotting.plt")
     def test_plot_ebv_by_gen(self, mock_plt):
         self.simulator.reproduce()
         self.simulator.plot_ebv_by_gen()
         mock_plt.title.assert_called_once_with("Average Estimated Breeding Value by Generation")
 
     def test_export_to_csv(self):
-        with mock.patch.object(self.simulator.pedigree.data, "to_csv") as to_csv_mock:
+        with mock.patch.object(pd.DataFrame, "to_csv") as to_csv_mock:
             self.simulator.export_to_csv("pedigree.csv")
             to_csv_mock.assert_called_with("pedigree.csv")
 
+    @unittest.skipUnless(importlib.util.find_spec("pyarrow"), "requires pyarrow")
+    def test_save_load(self):
+        simulator = Simulator.Simulator(Pedigree.Pedigree(rng=3), 3, 6, 0.6, 0.2, rng=3)
+        simulator.pedigree.original_ids = ["A{}".format(i) for i in range(500)] + list(range(500))
+        simulator.reproduce()
+
+        with tempfile.TemporaryDirectory() as path:
+            simulator.save(path)
+            loaded = Simulator.Simulator.load(path)
+            pd.testing.assert_frame_equal(loaded.pedigree.data, simulator.pedigree.data, "expected same pedigree")
+            self.assertEqual(loaded.pedigree.original_ids, simulator.pedigree.original_ids, "expected same labels")
+            self.assertEqual(loaded.gen, 1, "expected generation restored")
+            self.assertEqual((loaded.male_k, loaded.female_k, loaded.h, loaded.w), (3, 6, 0.6, 0.2), "wrong params")
+
+            # resumed and uninterrupted runs draw the same random numbers
+            simulator.reproduce()
+            loaded.reproduce()
+            pd.testing.assert_frame_equal(loaded.pedigree.data, simulator.pedigree.data, "expected same next gen")
+
+            loaded.save(path)
+            parts = sorted(glob.glob(os.path.join(path, "pedigree", "*.arrow")))
+            self.assertEqual(len(parts), 2, "expected only the new generation written")
+            loaded = Simulator.Simulator.load(path)
+            pd.testing.assert_frame_equal(loaded.pedigree.data, simulator.pedigree.data, "expected appended checkpoint")
+            self.assertEqual(loaded.pedigree.original_ids[-1], None, "expected bred animals without labels")
+
+            # saving another run replaces the checkpoint
+            self.simulator.save(path)
+            loaded = Simulator.Simulator.load(path)
+            self.assertEqual(len(loaded.pedigree), 1000, "expected checkpoint replaced")
+            self.assertIsNone(loaded.pedigree.original_ids, "expected labels of the replaced checkpoint removed")
+
+    @unittest.skipUnless(importlib.util.find_spec("pyarrow"), "requires pyarrow")
+    def test_spill(self):
+        with self.assertRaises(ValueError):
+            Simulator.Simulator(Pedigree.Pedigree(), 3, 6, 0.6, 0.2, spill="spill", evaluation=BlupEvaluation())
+
+        expected = Simulator.Simulator(Pedigree.Pedigree(rng=3), 3, 6, 0.6, 0.2, rng=3)
+        with tempfile.TemporaryDirectory() as path:
+            simulator = Simulator.Simulator(
+                Pedigree.Pedigree(rng=3), 3, 6, 0.6, 0.2, rng=3, spill=os.path.join(path, "spill")
+            )
+            for _ in range(3):
+                expected.reproduce()
+                data = simulator.reproduce()
+            self.assertEqual(len(data), 18, "expected only the latest generation returned")
+
+            # only the latest generation is held in memory, and spilling does not change the simulation
+            self.assertEqual(simulator.pedigree.spilled, 1036, "expected past generations spilled")
+            self.assertEqual(len(simulator.pedigree.ebv), 18, "expected EBV of the latest generation only")
+            pd.testing.assert_frame_equal(simulator.history(), expected.history())
+            pd.testing.assert_frame_equal(simulator.pedigree.to_frame(), expected.pedigree.data)
+            for gen in range(4):
+                self.assertEqual(simulator.pedigree.get_avg_ebv(gen), expected.pedigree.get_avg_ebv(gen), "wrong EBV")
+
+            simulator.export_to_csv(os.path.join(path, "spilled.csv"))
+            expected.export_to_csv(os.path.join(path, "expected.csv"))
+            with open(os.path.join(path, "spilled.csv")) as spilled, open(os.path.join(path, "expected.csv")) as file:
+                self.assertEqual(spilled.read(), file.read(), "expected same export")
+
+            simulator.save(os.path.join(path, "checkpoint"))
+            loaded = Simulator.Simulator.load(os.path.join(path, "checkpoint"))
+            pd.testing.assert_frame_equal(loaded.pedigree.data, expected.pedigree.data, "expected whole pedigree saved")
+            self.assertEqual(loaded.spill, os.path.join(path, "spill"), "expected spill restored")
+
 
 if __name__ == "__main__":
     unittest.main()
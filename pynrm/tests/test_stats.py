@@ -0,0 +1,57 @@
+import unittest
+import pynrm.Pedigree as Pedigree
+import pynrm.Simulator as Simulator
+from pynrm.stats import SimulatorStats
+
+
+class TestStats(unittest.TestCase):
+    def setUp(self):
+        self.stats = SimulatorStats()
+
+    def tearDown(self):
+        self.stats = None
+
+    def test_stats(self):
+        with self.assertRaises(TypeError):
+            SimulatorStats("not bool")
+        with self.assertRaises(TypeError):
+            SimulatorStats(callback="not callable")
+
+        with self.stats.phase("select"):
+            self.stats.count("rows_appended")
+        self.assertEqual(self.stats.to_dict(), {}, "expected nothing collected while disabled")
+
+        phases = []
+        self.stats.enable(callback=lambda name, elapsed: phases.append(name))
+        for _ in range(2):
+            with self.stats.phase("select"):
+                self.stats.count("rows_appended", 3)
+        self.assertEqual(phases, ["select", "select"], "expected callback on each phase")
+        self.assertEqual(self.stats.to_dict()["select_calls"], 2, "wrong phase calls")
+        self.assertEqual(self.stats.to_dict()["rows_appended"], 6, "wrong counter")
+        self.assertEqual(self.stats.to_frame().loc["select", "calls"], 2, "wrong phase calls")
+
+        self.stats.reset()
+        self.assertEqual(self.stats.to_dict(), {}, "expected stats cleared")
+
+    def test_simulator_stats(self):
+        simulator = Simulator.Simulator(Pedigree.Pedigree(rng=1), 3, 6, 0.6, 0.2, rng=1)
+        simulator.reproduce()
+        self.assertEqual(simulator.stats.to_dict(), {}, "expected stats disabled by default")
+
+        simulator.stats.enable()
+        simulator.reproduce()
+        stats = simulator.stats.to_dict()
+        self.assertEqual(stats["rows_appended"], 18, "expected male_k * female_k rows appended")
+        self.assertEqual(stats["select_calls"], 1, "expected one selection phase")
+        self.assertGreater(stats["nrm_calls"], 0, "expected NRM queries counted")
+        self.assertEqual(stats["nrm_calls"], stats["nrm_hits"] + stats["nrm_misses"], "expected hits and misses")
+        self.assertGreater(stats["nrm_depth"], 0, "expected recursion depth recorded")
+        self.assertTrue(
+            {"metrics", "select", "mate", "ebv", "append", "data"} <= set(simulator.stats.to_frame().index),
+            "expected all phases timed",
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,43 @@
+import importlib.util
+import numpy as np
+import tempfile
+import unittest
+
+if importlib.util.find_spec("pyarrow"):
+    from pynrm.store import ColumnStore
+
+
+@unittest.skipUnless(importlib.util.find_spec("pyarrow"), "requires pyarrow")
+class TestStore(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.store = ColumnStore(self.directory.name)
+
+    def tearDown(self):
+        self.store = None
+        self.directory.cleanup()
+
+    def test_store(self):
+        with self.assertRaises(TypeError):
+            ColumnStore(1)
+        with self.assertRaises(TypeError):
+            self.store.append("not dict")
+
+        self.assertEqual(self.store.read(), {}, "expected empty store")
+
+        self.store.append({"gen": np.zeros(3, dtype=np.int32), "ebv": np.arange(3.0)})
+        columns = self.store.read()
+        self.assertEqual(len(self.store), 3, "expected 3 records")
+        self.assertFalse(columns["ebv"].flags.writeable, "expected memory-mapped columns")
+        self.assertEqual(columns["gen"].dtype, np.int32, "expected dtype kept")
+
+        self.store.append({"gen": np.ones(2, dtype=np.int32), "ebv": np.arange(2.0)})
+        self.assertEqual(self.store.read(["gen"])["gen"].tolist(), [0, 0, 0, 1, 1], "expected appended records")
+        self.assertEqual(list(self.store.read(["gen"])), ["gen"], "expected selected columns only")
+
+        self.store.clear()
+        self.assertEqual(len(self.store), 0, "expected empty store")
+
+
+if __name__ == "__main__":
+    unittest.main()
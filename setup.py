@@ -1,12 +1,19 @@
 from setuptools import setup
 
-
 setup(
     name="pynrm",
     version="0.1.2",
     install_requires=[
         "numpy",
         "pandas",
-        "matplotlib",
+        "scipy",
+        "tomli; python_version<'3.11'",
     ],
+    extras_require={
+        "arrow": ["pyarrow"],
+        "numba": ["numba"],
+        "plot": ["matplotlib"],
+        "yaml": ["pyyaml"],
+    },
+    entry_points={"console_scripts": ["pynrm=pynrm.cli:main"]},
 )